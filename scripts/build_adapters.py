@@ -9,12 +9,19 @@ import os
 import sys
 import subprocess
 import shutil
+import tempfile
 from pathlib import Path
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# NuGet packages the adapters use at runtime (kept in step with SolidWorksAdapters.csproj)
+PACKAGES = [("System.Text.Json", "8.0.5")]
+
+# Framework folders to take package assemblies from, most preferred first
+LIB_FRAMEWORKS = ["net462", "net461", "net46", "net45", "netstandard2.0"]
+
 
 def find_csc_compiler():
     """Find the C# compiler"""
@@ -87,6 +94,47 @@ def copy_solidworks_dlls():
     return copied == len(dlls)
 
 
+def copy_package_dlls():
+    """Fetch System.Text.Json and its dependencies into the references folder"""
+    ref_dir = Path(__file__).parent.parent / "src" / "solidworks_adapters" / "references"
+    ref_dir.mkdir(exist_ok=True)
+    
+    if (ref_dir / "System.Text.Json.dll").exists():
+        return True
+    
+    nuget = shutil.which("nuget")
+    if not nuget:
+        logger.warning(f"nuget not found; place System.Text.Json.dll and its dependencies in {ref_dir}")
+        return False
+    
+    with tempfile.TemporaryDirectory() as packages_dir:
+        for name, version in PACKAGES:
+            cmd = [
+                nuget, "install", name,
+                "-Version", version,
+                "-Framework", "net48",
+                "-OutputDirectory", packages_dir,
+                "-NonInteractive",
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.error(f"Could not install {name} {version}")
+                logger.error(result.stderr)
+                return False
+        
+        # nuget installs each dependency into its own folder next to the package
+        for package_dir in Path(packages_dir).iterdir():
+            lib_dir = package_dir / "lib"
+            for framework in LIB_FRAMEWORKS:
+                if (lib_dir / framework).is_dir():
+                    for dll in (lib_dir / framework).glob("*.dll"):
+                        shutil.copy2(dll, ref_dir / dll.name)
+                        logger.info(f"Copied {dll.name} to references folder")
+                    break
+    
+    return True
+
+
 def build_with_csc(csc_path: str, version: str):
     """Build adapter using csc compiler"""
     base_dir = Path(__file__).parent.parent
@@ -103,6 +151,9 @@ def build_with_csc(csc_path: str, version: str):
         logger.warning(f"C# source file not found: {cs_file}")
         return False
     
+    # Reference the SolidWorks interop and the package assemblies
+    ref_dlls = sorted((adapter_dir / "references").glob("*.dll"))
+    
     # Build command
     cmd = [
         csc_path,
@@ -110,9 +161,7 @@ def build_with_csc(csc_path: str, version: str):
         f"/out:{output_dll}",
         "/platform:x64",
         "/optimize+",
-        f"/reference:{adapter_dir}/references/SolidWorks.Interop.sldworks.dll",
-        f"/reference:{adapter_dir}/references/SolidWorks.Interop.swconst.dll",
-        f"/reference:{adapter_dir}/references/SolidWorks.Interop.swpublished.dll",
+        *[f"/reference:{dll}" for dll in ref_dlls],
         str(cs_file)
     ]
     
@@ -120,6 +169,11 @@ def build_with_csc(csc_path: str, version: str):
     result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode == 0:
+        # The adapter is loaded from its version folder, so its package
+        # dependencies have to be copied there as well
+        for dll in ref_dlls:
+            if not dll.name.startswith("SolidWorks.Interop."):
+                shutil.copy2(dll, version_dir / dll.name)
         logger.info(f"Successfully built {output_dll}")
         return True
     else:
@@ -208,6 +262,9 @@ def main():
     if compiler == "dotnet":
         success = build_with_dotnet()
     else:
+        if not copy_package_dlls():
+            logger.warning("Could not fetch System.Text.Json. Build may fail.")
+        
         # Build each version
         versions = ["2021", "2022", "2023", "2024", "2025"]
         success = True
@@ -8,6 +8,7 @@ information from SolidWorks models and operations.
 import json
 import logging
 from typing import Any, Dict, List, Optional
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 
@@ -349,22 +350,14 @@ Mass Properties:
             return "No features found"
         
         # Count feature types
-        feature_types = {}
-        suppressed_count = 0
-        
-        for feature in features:
-            ftype = feature.get("type", "Unknown")
-            feature_types[ftype] = feature_types.get(ftype, 0) + 1
-            
-            if feature.get("suppressed", False):
-                suppressed_count += 1
+        feature_types = Counter(feature.get("type", "Unknown") for feature in features)
+        suppressed_count = sum(1 for feature in features if feature.get("suppressed", False))
         
         summary_parts = [f"Total features: {len(features)}"]
         
         # Top feature types
-        sorted_types = sorted(feature_types.items(), key=lambda x: x[1], reverse=True)
         summary_parts.append("Feature types:")
-        for ftype, count in sorted_types[:5]:
+        for ftype, count in feature_types.most_common(5):
             summary_parts.append(f"  - {ftype}: {count}")
         
         if suppressed_count > 0:
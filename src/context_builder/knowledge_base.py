@@ -5,9 +5,10 @@ Stores and retrieves CAD operations, patterns, and best practices
 to provide context for AI-assisted automation.
 """
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import hashlib
 
@@ -78,6 +79,28 @@ class SolidWorksKnowledgeBase:
         tags: Optional[List[str]] = None
     ) -> str:
         """Store a SolidWorks operation and its outcome"""
+        operation_id, search_text, document = self._prepare_operation(
+            operation, context, result, success, tags
+        )
+        
+        self.operations_collection.add(
+            documents=[search_text],
+            metadatas=[document],
+            ids=[operation_id]
+        )
+        
+        logger.info(f"Stored operation: {operation_id}")
+        return operation_id
+
+    def _prepare_operation(
+        self,
+        operation: str,
+        context: Dict[str, Any],
+        result: Dict[str, Any],
+        success: bool,
+        tags: Optional[List[str]] = None
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the id, search text and metadata for an operation record"""
         operation_id = self._generate_id(operation, context)
         
         document = {
@@ -92,24 +115,38 @@ class SolidWorksKnowledgeBase:
         # Create searchable text
         search_text = f"{operation} {' '.join(tags or [])} {context.get('description', '')}"
         
-        self.operations_collection.add(
+        return operation_id, search_text, document
+
+    async def store_design_pattern(
+        self,
+        name: str,
+        description: str,
+        pattern_type: str,
+        implementation: Dict[str, Any],
+        examples: Optional[List[Dict[str, Any]]] = None
+    ) -> str:
+        """Store a design pattern"""
+        pattern_id, search_text, document = self._prepare_design_pattern(
+            name, description, pattern_type, implementation, examples
+        )
+        
+        self.patterns_collection.add(
             documents=[search_text],
             metadatas=[document],
-            ids=[operation_id]
+            ids=[pattern_id]
         )
         
-        logger.info(f"Stored operation: {operation_id}")
-        return operation_id
+        return pattern_id
 
-    async def store_design_pattern(
+    def _prepare_design_pattern(
         self,
         name: str,
         description: str,
         pattern_type: str,
         implementation: Dict[str, Any],
         examples: Optional[List[Dict[str, Any]]] = None
-    ) -> str:
-        """Store a design pattern"""
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the id, search text and metadata for a design pattern record"""
         pattern_id = self._generate_id(name, {"type": pattern_type})
         
         document = {
@@ -123,22 +160,36 @@ class SolidWorksKnowledgeBase:
         
         search_text = f"{name} {description} {pattern_type}"
         
-        self.patterns_collection.add(
+        return pattern_id, search_text, document
+
+    async def store_error_solution(
+        self,
+        error_message: str,
+        error_context: Dict[str, Any],
+        solution: str,
+        solution_steps: List[str]
+    ) -> str:
+        """Store an error and its solution"""
+        error_id, search_text, document = self._prepare_error_solution(
+            error_message, error_context, solution, solution_steps
+        )
+        
+        self.errors_collection.add(
             documents=[search_text],
             metadatas=[document],
-            ids=[pattern_id]
+            ids=[error_id]
         )
         
-        return pattern_id
+        return error_id
 
-    async def store_error_solution(
+    def _prepare_error_solution(
         self,
         error_message: str,
         error_context: Dict[str, Any],
         solution: str,
         solution_steps: List[str]
-    ) -> str:
-        """Store an error and its solution"""
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the id, search text and metadata for an error record"""
         error_id = self._generate_id(error_message, error_context)
         
         document = {
@@ -151,23 +202,38 @@ class SolidWorksKnowledgeBase:
         
         search_text = f"{error_message} {solution}"
         
-        self.errors_collection.add(
+        return error_id, search_text, document
+
+    async def store_macro_pattern(
+        self,
+        macro_name: str,
+        description: str,
+        code_snippet: str,
+        use_cases: List[str],
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Store a VBA macro pattern"""
+        macro_id, search_text, document = self._prepare_macro_pattern(
+            macro_name, description, code_snippet, use_cases, parameters
+        )
+        
+        self.macros_collection.add(
             documents=[search_text],
             metadatas=[document],
-            ids=[error_id]
+            ids=[macro_id]
         )
         
-        return error_id
+        return macro_id
 
-    async def store_macro_pattern(
+    def _prepare_macro_pattern(
         self,
         macro_name: str,
         description: str,
         code_snippet: str,
         use_cases: List[str],
         parameters: Optional[Dict[str, Any]] = None
-    ) -> str:
-        """Store a VBA macro pattern"""
+    ) -> Tuple[str, str, Dict[str, Any]]:
+        """Build the id, search text and metadata for a macro record"""
         macro_id = self._generate_id(macro_name, {"type": "vba"})
         
         document = {
@@ -181,13 +247,86 @@ class SolidWorksKnowledgeBase:
         
         search_text = f"{macro_name} {description} {' '.join(use_cases)}"
         
-        self.macros_collection.add(
-            documents=[search_text],
-            metadatas=[document],
-            ids=[macro_id]
-        )
+        return macro_id, search_text, document
+
+    def prepare_record(self, kind: str, **kwargs) -> Tuple[str, str, str, Dict[str, Any]]:
+        """
+        Serialize a record for store_prepared without storing it
+        
+        Args:
+            kind: One of "operation", "design_pattern", "error_solution" or
+                "macro_pattern"
+            **kwargs: Arguments of the matching store_* method
+            
+        Returns:
+            (kind, id, search_text, document); raises TypeError or ValueError
+            if the arguments cannot be serialized
+        """
+        prepare = {
+            "operation": self._prepare_operation,
+            "design_pattern": self._prepare_design_pattern,
+            "error_solution": self._prepare_error_solution,
+            "macro_pattern": self._prepare_macro_pattern,
+        }
+        return (kind, *prepare[kind](**kwargs))
+
+    async def store_batch(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Store several records with one add() per collection
+        
+        Args:
+            batch: (kind, kwargs) pairs, as taken by prepare_record
+            
+        Returns:
+            IDs of the stored records, in batch order. Records that cannot
+            be serialized are logged and skipped.
+        """
+        records = []
+        for kind, kwargs in batch:
+            try:
+                records.append(self.prepare_record(kind, **kwargs))
+            except (TypeError, ValueError) as e:
+                # One bad record must not cost the rest of the batch
+                logger.error(f"Skipping {kind} record that could not be serialized: {e}")
+        
+        return await self.store_prepared(records)
+
+    async def store_prepared(self, records: List[Tuple[str, str, str, Dict[str, Any]]]) -> List[str]:
+        """
+        Store records from prepare_record with one add() per collection
+        
+        ChromaDB embeds documents synchronously inside add(), so each add
+        runs in a worker thread to keep the event loop free.
+        
+        Returns:
+            IDs of the stored records, in order
+        """
+        collections = {
+            "operation": self.operations_collection,
+            "design_pattern": self.patterns_collection,
+            "error_solution": self.errors_collection,
+            "macro_pattern": self.macros_collection,
+        }
         
-        return macro_id
+        # kind -> {id: (search_text, document)}
+        pending: Dict[str, Dict[str, Tuple[str, Dict[str, Any]]]] = {}
+        stored_ids = []
+        
+        for kind, record_id, search_text, document in records:
+            # Later records with the same id replace earlier ones within a batch
+            pending.setdefault(kind, {})[record_id] = (search_text, document)
+            stored_ids.append(record_id)
+        
+        for kind, by_id in pending.items():
+            await asyncio.to_thread(
+                collections[kind].add,
+                documents=[search_text for search_text, _ in by_id.values()],
+                metadatas=[document for _, document in by_id.values()],
+                ids=list(by_id)
+            )
+        
+        logger.info(f"Stored batch of {len(stored_ids)} records")
+        return stored_ids
 
     async def find_similar_operations(
         self,
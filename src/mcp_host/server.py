@@ -11,6 +11,7 @@ import logging
 from typing import Any, Dict, List, Optional
 from pathlib import Path
 
+from pydantic import Field
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -35,17 +36,30 @@ from ..version_manager.manager import VersionManager
 logger = logging.getLogger(__name__)
 
 
+class _RawTextContent(TextContent):
+    """TextContent that also carries the unserialized tool result (test mode only)"""
+    raw: Any = Field(default=None, exclude=True)
+
+
 class SolidWorksMCPServer:
     """Main MCP server for SolidWorks integration"""
 
-    def __init__(self):
+    def __init__(self, test_mode: bool = False):
+        self.test_mode = test_mode
         self.server = Server("solidworks-mcp")
         self.context_builder = SolidWorksContextBuilder()
         self.adapter_factory = AdapterFactory()
         self.tools = SolidWorksTools()
         self.event_manager = EventManager()
-        self.version_manager = VersionManager()
+        # Installed versions are scanned in run(), off the event loop
+        self.version_manager = VersionManager(load=False)
         self.current_adapter = None
+        # Serializes adapter creation on the first tool calls; created on first
+        # use because it needs a running event loop
+        self._adapter_lock: Optional[asyncio.Lock] = None
+        # The tool and prompt lists are static; build them on first request only
+        self._tools_cache: Optional[List[Tool]] = None
+        self._prompts_cache: Optional[List[Prompt]] = None
         
         self._setup_handlers()
 
@@ -55,133 +69,135 @@ class SolidWorksMCPServer:
         @self.server.list_tools()
         async def list_tools() -> List[Tool]:
             """List available SolidWorks tools"""
-            return [
-                Tool(
-                    name="open_model",
-                    description="Open a SolidWorks model file",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "file_path": {
-                                "type": "string",
-                                "description": "Path to the SolidWorks file (.sldprt, .sldasm, .slddrw)"
-                            }
-                        },
-                        "required": ["file_path"]
-                    }
-                ),
-                Tool(
-                    name="get_features",
-                    description="Get all features from the active model",
-                    input_schema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                Tool(
-                    name="modify_dimension",
-                    description="Modify a dimension value in the model",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "feature_name": {
-                                "type": "string",
-                                "description": "Name of the feature containing the dimension"
-                            },
-                            "dimension_name": {
-                                "type": "string",
-                                "description": "Name of the dimension to modify"
+            if self._tools_cache is None:
+                self._tools_cache = [
+                    Tool(
+                        name="open_model",
+                        description="Open a SolidWorks model file",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "file_path": {
+                                    "type": "string",
+                                    "description": "Path to the SolidWorks file (.sldprt, .sldasm, .slddrw)"
+                                }
                             },
-                            "value": {
-                                "type": "number",
-                                "description": "New value for the dimension"
-                            }
-                        },
-                        "required": ["feature_name", "dimension_name", "value"]
-                    }
-                ),
-                Tool(
-                    name="run_macro",
-                    description="Run a VBA macro in SolidWorks",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "macro_path": {
-                                "type": "string",
-                                "description": "Path to the VBA macro file (.swp)"
+                            "required": ["file_path"]
+                        }
+                    ),
+                    Tool(
+                        name="get_features",
+                        description="Get all features from the active model",
+                        input_schema={
+                            "type": "object",
+                            "properties": {}
+                        }
+                    ),
+                    Tool(
+                        name="modify_dimension",
+                        description="Modify a dimension value in the model",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "feature_name": {
+                                    "type": "string",
+                                    "description": "Name of the feature containing the dimension"
+                                },
+                                "dimension_name": {
+                                    "type": "string",
+                                    "description": "Name of the dimension to modify"
+                                },
+                                "value": {
+                                    "type": "number",
+                                    "description": "New value for the dimension"
+                                }
                             },
-                            "macro_name": {
-                                "type": "string",
-                                "description": "Name of the macro procedure to run"
-                            }
-                        },
-                        "required": ["macro_path"]
-                    }
-                ),
-                Tool(
-                    name="update_design_table",
-                    description="Update values in a design table",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "table_name": {
-                                "type": "string",
-                                "description": "Name of the design table"
+                            "required": ["feature_name", "dimension_name", "value"]
+                        }
+                    ),
+                    Tool(
+                        name="run_macro",
+                        description="Run a VBA macro in SolidWorks",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "macro_path": {
+                                    "type": "string",
+                                    "description": "Path to the VBA macro file (.swp)"
+                                },
+                                "macro_name": {
+                                    "type": "string",
+                                    "description": "Name of the macro procedure to run"
+                                }
                             },
-                            "configuration": {
-                                "type": "string",
-                                "description": "Configuration name"
+                            "required": ["macro_path"]
+                        }
+                    ),
+                    Tool(
+                        name="update_design_table",
+                        description="Update values in a design table",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "table_name": {
+                                    "type": "string",
+                                    "description": "Name of the design table"
+                                },
+                                "configuration": {
+                                    "type": "string",
+                                    "description": "Configuration name"
+                                },
+                                "values": {
+                                    "type": "object",
+                                    "description": "Key-value pairs of parameters to update"
+                                }
                             },
-                            "values": {
-                                "type": "object",
-                                "description": "Key-value pairs of parameters to update"
-                            }
-                        },
-                        "required": ["table_name", "values"]
-                    }
-                ),
-                Tool(
-                    name="export_model",
-                    description="Export the model to various formats",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "output_path": {
-                                "type": "string",
-                                "description": "Path for the exported file"
+                            "required": ["table_name", "values"]
+                        }
+                    ),
+                    Tool(
+                        name="export_model",
+                        description="Export the model to various formats",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "output_path": {
+                                    "type": "string",
+                                    "description": "Path for the exported file"
+                                },
+                                "format": {
+                                    "type": "string",
+                                    "enum": ["STEP", "IGES", "STL", "PDF", "DXF", "DWG"],
+                                    "description": "Export format"
+                                }
                             },
-                            "format": {
-                                "type": "string",
-                                "enum": ["STEP", "IGES", "STL", "PDF", "DXF", "DWG"],
-                                "description": "Export format"
-                            }
-                        },
-                        "required": ["output_path", "format"]
-                    }
-                ),
-                Tool(
-                    name="get_model_info",
-                    description="Get detailed information about the current model",
-                    input_schema={
-                        "type": "object",
-                        "properties": {}
-                    }
-                ),
-                Tool(
-                    name="rebuild_model",
-                    description="Rebuild the current model",
-                    input_schema={
-                        "type": "object",
-                        "properties": {
-                            "force": {
-                                "type": "boolean",
-                                "description": "Force rebuild even if not needed",
-                                "default": False
+                            "required": ["output_path", "format"]
+                        }
+                    ),
+                    Tool(
+                        name="get_model_info",
+                        description="Get detailed information about the current model",
+                        input_schema={
+                            "type": "object",
+                            "properties": {}
+                        }
+                    ),
+                    Tool(
+                        name="rebuild_model",
+                        description="Rebuild the current model",
+                        input_schema={
+                            "type": "object",
+                            "properties": {
+                                "force": {
+                                    "type": "boolean",
+                                    "description": "Force rebuild even if not needed",
+                                    "default": False
+                                }
                             }
                         }
-                    }
-                ),
-            ]
+                    ),
+                ]
+            return list(self._tools_cache)
 
         @self.server.call_tool()
         async def call_tool(name: str, arguments: Dict[str, Any]) -> List[TextContent]:
@@ -189,72 +205,76 @@ class SolidWorksMCPServer:
             try:
                 # Initialize adapter if needed
                 if not self.current_adapter:
-                    version = self.version_manager.detect_version()
-                    self.current_adapter = self.adapter_factory.get_adapter(version)
-                    await self.current_adapter.connect()
+                    if self._adapter_lock is None:
+                        self._adapter_lock = asyncio.Lock()
+                    async with self._adapter_lock:
+                        # Another call may have connected while this one waited
+                        if not self.current_adapter:
+                            version = await asyncio.to_thread(self.version_manager.detect_version)
+                            adapter = self.adapter_factory.get_adapter(version)
+                            await adapter.connect()
+                            self.current_adapter = adapter
+                            # Cached dimensions belong to the previous adapter's document
+                            self.tools.clear_dimension_cache()
 
                 # Execute the tool
                 result = await self.tools.execute(name, arguments, self.current_adapter)
                 
-                return [TextContent(
-                    type="text",
-                    text=json.dumps(result, indent=2)
-                )]
+                return [self._text_content(result)]
                 
             except Exception as e:
                 logger.error(f"Tool execution error: {e}")
-                return [TextContent(
-                    type="text",
-                    text=json.dumps({
-                        "error": str(e),
-                        "tool": name,
-                        "arguments": arguments
-                    }, indent=2)
-                )]
+                return [self._text_content({
+                    "error": str(e),
+                    "tool": name,
+                    "arguments": arguments
+                })]
 
         @self.server.list_prompts()
         async def list_prompts() -> List[Prompt]:
             """List available prompts for SolidWorks operations"""
-            return [
-                Prompt(
-                    name="analyze_model",
-                    description="Analyze a SolidWorks model and provide insights",
-                    arguments=[
-                        PromptArgument(
-                            name="file_path",
-                            description="Path to the SolidWorks file",
-                            required=True
-                        )
-                    ]
-                ),
-                Prompt(
-                    name="optimize_design",
-                    description="Suggest optimizations for a design",
-                    arguments=[
-                        PromptArgument(
-                            name="optimization_goal",
-                            description="What to optimize for (weight, strength, cost, etc.)",
-                            required=True
-                        )
-                    ]
-                ),
-                Prompt(
-                    name="create_variants",
-                    description="Generate design variants based on parameters",
-                    arguments=[
-                        PromptArgument(
-                            name="parameters",
-                            description="Parameters to vary",
-                            required=True
-                        ),
-                        PromptArgument(
-                            name="count",
-                            description="Number of variants to generate",
-                            required=False
-                        )
-                    ]
-                ),
-            ]
+            if self._prompts_cache is None:
+                self._prompts_cache = [
+                    Prompt(
+                        name="analyze_model",
+                        description="Analyze a SolidWorks model and provide insights",
+                        arguments=[
+                            PromptArgument(
+                                name="file_path",
+                                description="Path to the SolidWorks file",
+                                required=True
+                            )
+                        ]
+                    ),
+                    Prompt(
+                        name="optimize_design",
+                        description="Suggest optimizations for a design",
+                        arguments=[
+                            PromptArgument(
+                                name="optimization_goal",
+                                description="What to optimize for (weight, strength, cost, etc.)",
+                                required=True
+                            )
+                        ]
+                    ),
+                    Prompt(
+                        name="create_variants",
+                        description="Generate design variants based on parameters",
+                        arguments=[
+                            PromptArgument(
+                                name="parameters",
+                                description="Parameters to vary",
+                                required=True
+                            ),
+                            PromptArgument(
+                                name="count",
+                                description="Number of variants to generate",
+                                required=False
+                            )
+                        ]
+                    ),
+                ]
+            return list(self._prompts_cache)
 
         @self.server.get_prompt()
         async def get_prompt(name: str, arguments: Dict[str, Any]) -> PromptMessage:
@@ -304,8 +324,16 @@ class SolidWorksMCPServer:
                 text=json.dumps(info, indent=2)
             )
 
+    def _text_content(self, payload: Dict[str, Any]) -> TextContent:
+        """Serialize a tool result; in test mode the dict is also kept as .raw"""
+        text = json.dumps(payload, indent=2)
+        if self.test_mode:
+            return _RawTextContent(type="text", text=text, raw=payload)
+        return TextContent(type="text", text=text)
+
     async def run(self):
         """Run the MCP server"""
+        await self.version_manager.load_async()
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(
                 read_stream,
@@ -317,6 +345,7 @@ class SolidWorksMCPServer:
         """Clean up resources"""
         if self.current_adapter:
             await self.current_adapter.disconnect()
+        await self.tools.close()
         await self.event_manager.cleanup()
 
 
@@ -6,13 +6,46 @@ Defines the common interface that all adapters must implement.
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _export_formatter(defaults: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build a formatter that overlays caller options on a format's defaults"""
+    def formatter(options: Dict[str, Any]) -> Dict[str, Any]:
+        formatted = dict(defaults)
+        if options:
+            formatted.update(options)
+        return formatted
+    return formatter
+
+
+_fmt_default = _export_formatter({})
+
+# Export option formatters keyed by upper-case format name
+_EXPORT_FORMATTERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    'STEP': _export_formatter({
+        'version': 'AP214',
+        'export_as_solid': True
+    }),
+    'IGES': _export_formatter({
+        'export_curves': True,
+        'export_surfaces': True
+    }),
+    'STL': _export_formatter({
+        'binary': True,
+        'quality': 'fine'
+    }),
+    'PDF': _export_formatter({
+        'high_quality': True,
+        'embed_fonts': True
+    }),
+}
+
+
 class SolidWorksAdapter(ABC):
     """Abstract base class for SolidWorks adapters"""
 
@@ -33,8 +66,8 @@ class SolidWorksAdapter(ABC):
         pass
 
     @abstractmethod
-    async def open_document(self, file_path: str) -> Dict[str, Any]:
-        """Open a SolidWorks document"""
+    async def open_document(self, file_path: str, include_info: bool = False) -> Dict[str, Any]:
+        """Open a SolidWorks document, adding "model_info" on success if include_info is set"""
         pass
 
     @abstractmethod
@@ -192,26 +225,4 @@ class SolidWorksAdapter(ABC):
 
     def _format_export_options(self, format: str, options: Dict[str, Any]) -> Dict[str, Any]:
         """Format export options based on file format"""
-        default_options = {
-            'STEP': {
-                'version': 'AP214',
-                'export_as_solid': True
-            },
-            'IGES': {
-                'export_curves': True,
-                'export_surfaces': True
-            },
-            'STL': {
-                'binary': True,
-                'quality': 'fine'
-            },
-            'PDF': {
-                'high_quality': True,
-                'embed_fonts': True
-            }
-        }
-        
-        format_defaults = default_options.get(format, {})
-        if options:
-            format_defaults.update(options)
-        return format_defaults
\ No newline at end of file
+        return _EXPORT_FORMATTERS.get(format.upper(), _fmt_default)(options)
\ No newline at end of file
@@ -5,44 +5,113 @@ Dynamically loads the appropriate adapter based on the installed SolidWorks vers
 """
 
 import os
+import sys
 import logging
-from typing import Dict, Optional
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from .common.base_adapter import SolidWorksAdapter
 
 logger = logging.getLogger(__name__)
 
+# (package dir, year, module name, class name) for each supported version.
+# Adapter classes follow the SolidWorks{YEAR}Adapter naming convention.
+_VERSION_SPECS: Tuple[Tuple[str, str, str, str], ...] = tuple(
+    (v, v[2:], f"src.solidworks_adapters.{v}.adapter", f"SolidWorks{v[2:]}Adapter")
+    for v in ("sw2021", "sw2022", "sw2023", "sw2024", "sw2025")
+)
+_SUPPORTED_YEARS = frozenset(spec[1] for spec in _VERSION_SPECS)
+
+# Read once at import; deployments normally pin the version in the server environment
+_VERSION_ENV = os.getenv("SOLIDWORKS_VERSION")
+
+
+def _newest_supported(versions: List[str]) -> Optional[str]:
+    """Return the newest of the given version years that has a known adapter spec"""
+    supported = [v for v in versions if v in _SUPPORTED_YEARS]
+    return max(supported) if supported else None
+
+
+@lru_cache(maxsize=1)
+def _detect_installed_version() -> Optional[str]:
+    """Detect the installed SolidWorks version once per process, including a negative result"""
+    # Check environment variable first
+    if _VERSION_ENV:
+        return _VERSION_ENV
+    
+    # Check registry on Windows
+    if os.name == 'nt':
+        try:
+            import winreg
+            
+            # Enumerate "SOLIDWORKS YYYY" subkeys under a single open key
+            found = []
+            try:
+                with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks") as root:
+                    i = 0
+                    while True:
+                        try:
+                            name = winreg.EnumKey(root, i)
+                        except OSError:
+                            break
+                        i += 1
+                        if name.startswith("SOLIDWORKS "):
+                            found.append(name.split()[-1])
+            except OSError:
+                pass
+            
+            version = _newest_supported(found)
+            if version:
+                logger.info(f"Detected SolidWorks {version} from registry")
+                return version
+                    
+        except ImportError:
+            logger.warning("winreg module not available")
+    
+    # Check file system for installation
+    try:
+        with os.scandir(r"C:\Program Files\SOLIDWORKS Corp") as entries:
+            found = [
+                entry.name.split()[-1] for entry in entries
+                if entry.name.startswith("SOLIDWORKS ") and entry.is_dir()
+            ]
+    except OSError:
+        found = []
+    
+    version = _newest_supported(found)
+    if version:
+        logger.info(f"Detected SolidWorks {version} from file system")
+        return version
+    
+    logger.warning("Could not detect SolidWorks version")
+    return None
+
 
 class AdapterFactory:
     """Factory for creating version-specific SolidWorks adapters"""
 
     def __init__(self):
         self._adapters: Dict[str, type] = {}
+        # Loaded versions in ascending order; _adapters is only filled at load time
+        self._sorted_versions: Tuple[str, ...] = ()
         self._load_adapters()
 
     def _load_adapters(self):
         """Dynamically load all available adapters"""
         adapters_path = Path(__file__).parent
         
-        # List of supported versions
-        versions = ["sw2021", "sw2022", "sw2023", "sw2024", "sw2025"]
-        
-        for version in versions:
+        for version, year, module_name, class_name in _VERSION_SPECS:
             version_path = adapters_path / version
             if version_path.exists():
                 try:
                     # Import the adapter module
-                    module_name = f"src.solidworks_adapters.{version}.adapter"
                     adapter_module = __import__(module_name, fromlist=["adapter"])
                     
-                    # Get the adapter class (convention: SolidWorks{YEAR}Adapter)
-                    year = version[2:]  # Extract year from 'sw2024'
-                    class_name = f"SolidWorks{year}Adapter"
-                    
                     if hasattr(adapter_module, class_name):
                         adapter_class = getattr(adapter_module, class_name)
-                        self._adapters[year] = adapter_class
+                        self._adapters[sys.intern(year)] = adapter_class
                         logger.info(f"Loaded adapter for SolidWorks {year}")
                     else:
                         logger.warning(f"Adapter class {class_name} not found in {module_name}")
@@ -51,6 +120,8 @@ class AdapterFactory:
                     logger.warning(f"Could not load adapter for {version}: {e}")
                 except Exception as e:
                     logger.error(f"Error loading adapter for {version}: {e}")
+        
+        self._sorted_versions = tuple(sorted(self._adapters))
 
     def get_adapter(self, version: str) -> Optional[SolidWorksAdapter]:
         """
@@ -62,22 +133,22 @@ class AdapterFactory:
         Returns:
             Adapter instance or None if version not supported
         """
+        if isinstance(version, str):
+            version = sys.intern(version)
+        
         if version in self._adapters:
             adapter_class = self._adapters[version]
             return adapter_class()
         else:
             # Try to find the closest version
-            available_versions = sorted(self._adapters.keys())
+            available_versions = self._sorted_versions
             
             if not available_versions:
                 raise RuntimeError("No SolidWorks adapters available")
             
             # Find the closest lower version
-            closest_version = None
-            for v in reversed(available_versions):
-                if v <= version:
-                    closest_version = v
-                    break
+            index = bisect_right(available_versions, version)
+            closest_version = available_versions[index - 1] if index else None
             
             if closest_version:
                 logger.warning(
@@ -98,59 +169,11 @@ class AdapterFactory:
 
     def list_supported_versions(self) -> List[str]:
         """Get list of supported SolidWorks versions"""
-        return sorted(self._adapters.keys())
+        return list(self._sorted_versions)
 
     def detect_installed_version(self) -> Optional[str]:
         """Attempt to detect the installed SolidWorks version"""
-        # Check environment variable first
-        env_version = os.getenv("SOLIDWORKS_VERSION")
-        if env_version:
-            return env_version
-        
-        # Check registry on Windows
-        if os.name == 'nt':
-            try:
-                import winreg
-                
-                # Common registry paths for SolidWorks
-                registry_paths = [
-                    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks\SOLIDWORKS 2024"),
-                    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks\SOLIDWORKS 2023"),
-                    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks\SOLIDWORKS 2022"),
-                    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks\SOLIDWORKS 2021"),
-                    (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks\SOLIDWORKS 2025"),
-                ]
-                
-                for hkey, path in registry_paths:
-                    try:
-                        with winreg.OpenKey(hkey, path) as key:
-                            # Extract version from path
-                            version = path.split()[-1]
-                            logger.info(f"Detected SolidWorks {version} from registry")
-                            return version
-                    except WindowsError:
-                        continue
-                        
-            except ImportError:
-                logger.warning("winreg module not available")
-        
-        # Check file system for installation
-        common_paths = [
-            r"C:\Program Files\SOLIDWORKS Corp\SOLIDWORKS 2024",
-            r"C:\Program Files\SOLIDWORKS Corp\SOLIDWORKS 2023",
-            r"C:\Program Files\SOLIDWORKS Corp\SOLIDWORKS 2022",
-            r"C:\Program Files\SOLIDWORKS Corp\SOLIDWORKS 2021",
-            r"C:\Program Files\SOLIDWORKS Corp\SOLIDWORKS 2025",
-        ]
-        
-        for path in common_paths:
-            if Path(path).exists():
-                version = path.split()[-1]
-                logger.info(f"Detected SolidWorks {version} from file system")
-                return version
-        
-        logger.warning("Could not detect SolidWorks version")
-        return None
+        return _detect_installed_version()
 
     def get_best_adapter(self) -> SolidWorksAdapter:
         """Get the best available adapter based on detected version"""
@@ -160,8 +183,8 @@ class AdapterFactory:
             return self.get_adapter(detected_version)
         else:
             # Return the newest available adapter
-            if self._adapters:
-                newest_version = sorted(self._adapters.keys())[-1]
+            if self._sorted_versions:
+                newest_version = self._sorted_versions[-1]
                 logger.info(f"Using newest available adapter: {newest_version}")
                 return self.get_adapter(newest_version)
             else:
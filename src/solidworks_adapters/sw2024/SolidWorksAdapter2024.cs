@@ -1,6 +1,7 @@
 using System;
 using System.Collections.Generic;
 using System.Runtime.InteropServices;
+using System.Text.Json;
 using System.Threading.Tasks;
 using SolidWorks.Interop.sldworks;
 using SolidWorks.Interop.swconst;
@@ -398,6 +399,35 @@ namespace MCP.SolidWorks.Adapters
             });
         }
 
+        // JSON variants: serialize the whole result on the managed side so the
+        // Python bridge marshals a single string instead of walking nested .NET collections
+        public async Task<string> OpenDocumentJsonAsync(string filePath, bool includeInfo)
+        {
+            var result = await OpenDocumentAsync(filePath);
+            
+            if (includeInfo && result["success"] is true)
+            {
+                result["model_info"] = await GetModelInfoAsync();
+            }
+            
+            return JsonSerializer.Serialize(result);
+        }
+
+        public async Task<string> GetFeaturesJsonAsync()
+        {
+            return JsonSerializer.Serialize(await GetFeaturesAsync());
+        }
+
+        public async Task<string> RunMacroJsonAsync(string macroPath, string macroName, Dictionary<string, object> parameters)
+        {
+            return JsonSerializer.Serialize(await RunMacroAsync(macroPath, macroName, parameters));
+        }
+
+        public async Task<string> GetModelInfoJsonAsync()
+        {
+            return JsonSerializer.Serialize(await GetModelInfoAsync());
+        }
+
         // Helper methods
         private List<Dictionary<string, object>> GetFeatureDimensions(IFeature feature)
         {
@@ -438,6 +468,11 @@ namespace MCP.SolidWorks.Adapters
         }
     }
 
+    /// <summary>
+    /// Contract implemented by the version-specific adapters.
+    /// Dictionary arguments are only read for the duration of the call and must not be
+    /// retained; the Python bridge clears and reuses them once the returned Task completes.
+    /// </summary>
     public interface ISolidWorksAdapter
     {
         string Version { get; }
@@ -451,5 +486,9 @@ namespace MCP.SolidWorks.Adapters
         Task<bool> ExportFileAsync(string outputPath, string format, Dictionary<string, object> options);
         Task<Dictionary<string, object>> GetModelInfoAsync();
         Task<Tuple<bool, List<string>>> RebuildModelAsync(bool force);
+        Task<string> OpenDocumentJsonAsync(string filePath, bool includeInfo);
+        Task<string> GetFeaturesJsonAsync();
+        Task<string> RunMacroJsonAsync(string macroPath, string macroName, Dictionary<string, object> parameters);
+        Task<string> GetModelInfoJsonAsync();
     }
 }
\ No newline at end of file
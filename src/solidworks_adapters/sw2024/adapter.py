@@ -5,8 +5,10 @@ Python adapter that uses PythonNET to bridge to the C# SolidWorks adapter.
 """
 
 import asyncio
+import collections
 import json
 import logging
+import time
 from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
@@ -17,8 +19,34 @@ from System.Collections.Generic import Dictionary as NetDict
 
 from ..common.base_adapter import SolidWorksAdapter
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+_ADAPTER_DIR = Path(__file__).parent
+_ASSEMBLY_PATH = _ADAPTER_DIR / "SolidWorksAdapter2024.dll"
+_REFERENCES_DIR = _ADAPTER_DIR.parent / "references"
+
+
+def _resolve_adapter_dependency(sender, args):
+    """Load adapter dependencies (System.Text.Json and friends) from the adapter folder"""
+    # python.exe has no app.config binding redirects, so the runtime would
+    # otherwise only probe the interpreter's directory
+    name = System.Reflection.AssemblyName(args.Name).Name
+    candidate = _ADAPTER_DIR / f"{name}.dll"
+    if candidate.exists():
+        return System.Reflection.Assembly.LoadFrom(str(candidate))
+    return None
+
+
+# Kept at module level so the delegate is not garbage collected
+_ASSEMBLY_RESOLVER = System.ResolveEventHandler(_resolve_adapter_dependency)
+System.AppDomain.CurrentDomain.AssemblyResolve += _ASSEMBLY_RESOLVER
+
 
 class SolidWorks2024Adapter(SolidWorksAdapter):
     """Python adapter for SolidWorks 2024 using PythonNET bridge"""
@@ -26,19 +54,25 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
     def __init__(self):
         super().__init__("2024")
         self.cs_adapter = None
+        # (timestamp, info) of the last model info round-trip
+        self._model_info_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._model_info_ttl = 0.25
+        # Reusable NetDict[String, Object] argument buffers. The C# adapter
+        # only reads dictionary arguments for the duration of the call and
+        # never keeps a reference, so they can be cleared and reused.
+        self._netdict_pool: collections.deque = collections.deque(maxlen=8)
         self._load_assembly()
 
     def _load_assembly(self):
         """Load the C# assembly"""
         try:
             # Add reference to our C# adapter DLL
-            assembly_path = Path(__file__).parent / "SolidWorksAdapter2024.dll"
-            if assembly_path.exists():
-                clr.AddReference(str(assembly_path))
-            else:
+            try:
+                clr.AddReference(str(_ASSEMBLY_PATH))
+            except (System.IO.FileNotFoundException, FileNotFoundError):
                 # Try to compile the C# code if DLL doesn't exist
                 self._compile_cs_adapter()
-                clr.AddReference(str(assembly_path))
+                clr.AddReference(str(_ASSEMBLY_PATH))
             
             # Import the namespace
             from MCP.SolidWorks.Adapters import SolidWorksAdapter2024
@@ -52,17 +86,20 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
         """Compile the C# adapter if needed"""
         import subprocess
         
-        cs_file = Path(__file__).parent / "SolidWorksAdapter2024.cs"
-        dll_file = Path(__file__).parent / "SolidWorksAdapter2024.dll"
+        cs_file = _ADAPTER_DIR / "SolidWorksAdapter2024.cs"
+        dll_file = _ASSEMBLY_PATH
         
-        # Simple compilation command (requires .NET SDK)
+        # Simple compilation command (requires .NET SDK). The interop DLLs
+        # live in the shared references folder, the package DLLs are copied
+        # next to the adapter by the build.
         cmd = [
             "csc",
             "/target:library",
             f"/out:{dll_file}",
-            "/reference:SolidWorks.Interop.sldworks.dll",
-            "/reference:SolidWorks.Interop.swconst.dll",
-            "/reference:SolidWorks.Interop.swpublished.dll",
+            f"/reference:{_REFERENCES_DIR / 'SolidWorks.Interop.sldworks.dll'}",
+            f"/reference:{_REFERENCES_DIR / 'SolidWorks.Interop.swconst.dll'}",
+            f"/reference:{_REFERENCES_DIR / 'SolidWorks.Interop.swpublished.dll'}",
+            f"/reference:{_ADAPTER_DIR / 'System.Text.Json.dll'}",
             str(cs_file)
         ]
         
@@ -86,19 +123,25 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
             task = self.cs_adapter.DisconnectAsync()
             await self._await_task(task)
             self.connected = False
+            self._invalidate_model_info()
 
-    async def open_document(self, file_path: str) -> Dict[str, Any]:
+    async def open_document(self, file_path: str, include_info: bool = False) -> Dict[str, Any]:
         """Open a SolidWorks document"""
         validated_path = self._validate_file_path(file_path)
-        task = self.cs_adapter.OpenDocumentAsync(str(validated_path))
-        result = await self._await_task(task)
-        return self._convert_net_dict_to_dict(result)
+        # With include_info the C# side reads the model info right after the
+        # open, so both come back in a single interop call
+        task = self.cs_adapter.OpenDocumentJsonAsync(str(validated_path), include_info)
+        result = _json_loads(await self._await_task(task))
+        self._invalidate_model_info()
+        if "model_info" in result:
+            self._model_info_cache = (time.monotonic(), result["model_info"])
+        return result
 
     async def get_features(self) -> List[Dict[str, Any]]:
         """Get all features from the active model"""
-        task = self.cs_adapter.GetFeaturesAsync()
+        task = self.cs_adapter.GetFeaturesJsonAsync()
         result = await self._await_task(task)
-        return [self._convert_net_dict_to_dict(feat) for feat in result]
+        return _json_loads(result)
 
     async def modify_dimension(
         self, 
@@ -108,7 +151,9 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
     ) -> bool:
         """Modify a dimension value"""
         task = self.cs_adapter.ModifyDimensionAsync(feature_name, dimension_name, value)
-        return await self._await_task(task)
+        result = await self._await_task(task)
+        self._invalidate_model_info()
+        return result
 
     async def get_design_tables(self) -> List[Dict[str, Any]]:
         """Get all design tables in the model"""
@@ -124,12 +169,14 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
     ) -> bool:
         """Update design table values"""
         # Convert Python dict to .NET Dictionary
-        net_dict = NetDict[System.String, System.Object]()
-        for k, v in values.items():
-            net_dict[k] = v
-        
-        task = self.cs_adapter.UpdateDesignTableAsync(table_name, configuration, net_dict)
-        return await self._await_task(task)
+        net_dict = self._acquire_netdict(values)
+        try:
+            task = self.cs_adapter.UpdateDesignTableAsync(table_name, configuration, net_dict)
+            result = await self._await_task(task)
+        finally:
+            self._release_netdict(net_dict)
+        self._invalidate_model_info()
+        return result
 
     async def run_macro(
         self, 
@@ -138,19 +185,18 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
         parameters: Optional[Dict[str, Any]] = None
     ) -> Any:
         """Run a VBA macro"""
-        net_params = None
-        if parameters:
-            net_params = NetDict[System.String, System.Object]()
-            for k, v in parameters.items():
-                net_params[k] = v
-        
-        task = self.cs_adapter.RunMacroAsync(
-            macro_path, 
-            macro_name or "", 
-            net_params or NetDict[System.String, System.Object]()
-        )
-        result = await self._await_task(task)
-        return self._convert_net_dict_to_dict(result)
+        net_params = self._acquire_netdict(parameters)
+        try:
+            task = self.cs_adapter.RunMacroJsonAsync(
+                macro_path, 
+                macro_name or "", 
+                net_params
+            )
+            result = await self._await_task(task)
+        finally:
+            self._release_netdict(net_params)
+        self._invalidate_model_info()
+        return _json_loads(result)
 
     async def export_file(
         self, 
@@ -161,23 +207,31 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
         """Export the model to various formats"""
         formatted_options = self._format_export_options(format, options or {})
         
-        net_options = NetDict[System.String, System.Object]()
-        for k, v in formatted_options.items():
-            net_options[k] = v
-        
-        task = self.cs_adapter.ExportFileAsync(output_path, format, net_options)
-        return await self._await_task(task)
+        net_options = self._acquire_netdict(formatted_options)
+        try:
+            task = self.cs_adapter.ExportFileAsync(output_path, format, net_options)
+            return await self._await_task(task)
+        finally:
+            self._release_netdict(net_options)
 
     async def get_model_info(self) -> Dict[str, Any]:
         """Get detailed information about the current model"""
-        task = self.cs_adapter.GetModelInfoAsync()
-        result = await self._await_task(task)
-        return self._convert_net_dict_to_dict(result)
+        # Short-lived cache so back-to-back callers (custom properties, mass
+        # properties, context building) share a single round-trip
+        now = time.monotonic()
+        if self._model_info_cache and now - self._model_info_cache[0] < self._model_info_ttl:
+            return self._model_info_cache[1]
+        
+        task = self.cs_adapter.GetModelInfoJsonAsync()
+        result = _json_loads(await self._await_task(task))
+        self._model_info_cache = (now, result)
+        return result
 
     async def rebuild_model(self, force: bool = False) -> Tuple[bool, List[str]]:
         """Rebuild the model and return status and any errors"""
         task = self.cs_adapter.RebuildModelAsync(force)
         result = await self._await_task(task)
+        self._invalidate_model_info()
         return result.Item1, list(result.Item2)
 
     async def get_configurations(self) -> List[Dict[str, Any]]:
@@ -203,6 +257,7 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
     ) -> bool:
         """Set a custom property"""
         # To be implemented in C# adapter
+        self._invalidate_model_info()
         return False
 
     async def get_mass_properties(self) -> Dict[str, float]:
@@ -258,24 +313,24 @@ class SolidWorks2024Adapter(SolidWorksAdapter):
         return None
 
     # Helper methods
+    def _invalidate_model_info(self):
+        """Drop the cached model info after an operation that changes the model"""
+        self._model_info_cache = None
+
+    def _acquire_netdict(self, values: Optional[Dict[str, Any]] = None):
+        """Get a NetDict[String, Object] from the pool filled with the given values"""
+        net_dict = self._netdict_pool.pop() if self._netdict_pool else NetDict[System.String, System.Object]()
+        if values:
+            for k, v in values.items():
+                net_dict[k] = v
+        return net_dict
+
+    def _release_netdict(self, net_dict) -> None:
+        """Clear a NetDict once the C# call has completed and return it to the pool"""
+        net_dict.Clear()
+        self._netdict_pool.append(net_dict)
+
     async def _await_task(self, task):
         """Convert .NET Task to Python awaitable"""
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, task.Result)
-
-    def _convert_net_dict_to_dict(self, net_dict) -> Dict[str, Any]:
-        """Convert .NET Dictionary to Python dict"""
-        if net_dict is None:
-            return {}
-        
-        py_dict = {}
-        for key in net_dict.Keys:
-            value = net_dict[key]
-            if hasattr(value, 'Keys'):  # Nested dictionary
-                py_dict[str(key)] = self._convert_net_dict_to_dict(value)
-            elif hasattr(value, '__iter__') and not isinstance(value, str):  # List
-                py_dict[str(key)] = list(value)
-            else:
-                py_dict[str(key)] = value
-        
-        return py_dict
\ No newline at end of file
+        return await loop.run_in_executor(None, task.Result)
\ No newline at end of file
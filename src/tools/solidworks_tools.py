@@ -4,45 +4,83 @@ SolidWorks Tools Implementation
 Implements the actual tool operations that the MCP server exposes.
 """
 
+import os
+import sys
+import asyncio
 import json
 import logging
-from typing import Any, Dict, List, Optional
-from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from collections import Counter, deque
+from functools import lru_cache
 
 from ..solidworks_adapters.common.base_adapter import SolidWorksAdapter
 from ..context_builder.knowledge_base import SolidWorksKnowledgeBase
 
 logger = logging.getLogger(__name__)
 
+# Queued knowledge base writes before submitters wait for the drainer
+_KB_QUEUE_SIZE = 1024
+# Largest number of queued writes stored with one store_prepared call
+_KB_BATCH_SIZE = 64
+
+@lru_cache(maxsize=512)
+def _suffix(path: str) -> str:
+    """Lower-cased file extension of a path string"""
+    return os.path.splitext(path)[1].lower()
+
+
+def _ensure_parent_dir(path: str) -> None:
+    """Create the directory a file will be written to, if it does not exist yet"""
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+
+def _safe_stat(path: str) -> Optional[os.stat_result]:
+    """Stat a path, returning None if it does not exist or cannot be read"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
 
 class SolidWorksTools:
     """Implementation of SolidWorks MCP tools"""
 
-    def __init__(self, knowledge_base: Optional[SolidWorksKnowledgeBase] = None):
-        self.knowledge_base = knowledge_base or SolidWorksKnowledgeBase()
-        self._operation_history = []
+    # Knowledge base tags by file extension and by tool
+    _EXT_TAGS = {
+        ".sldprt": "part",
+        ".sldasm": "assembly",
+        ".slddrw": "drawing",
+    }
+    _OP_TAGS = {
+        "modify_dimension": "parametric",
+        "update_design_table": "parametric",
+        "export_model": "export",
+        "take_screenshot": "export",
+        "run_macro": "automation",
+    }
+    # Export formats accepted by export_model (matches the tool schema)
+    _VALID_FORMATS = frozenset(map(sys.intern, ["STEP", "IGES", "STL", "PDF", "DXF", "DWG"]))
 
-    async def execute(
+    def __init__(
         self, 
-        tool_name: str, 
-        arguments: Dict[str, Any], 
-        adapter: SolidWorksAdapter
-    ) -> Dict[str, Any]:
-        """
-        Execute a tool operation
-        
-        Args:
-            tool_name: Name of the tool to execute
-            arguments: Tool arguments
-            adapter: SolidWorks adapter instance
-            
-        Returns:
-            Result dictionary
-        """
-        logger.info(f"Executing tool: {tool_name} with args: {arguments}")
+        knowledge_base: Optional[SolidWorksKnowledgeBase] = None,
+        max_history: int = 1000
+    ):
+        self.knowledge_base = knowledge_base or SolidWorksKnowledgeBase()
+        # Lightweight records only; full arguments and results go to the knowledge base
+        self._operation_history = deque(maxlen=max_history)
+        # (feature_name, dimension_name) -> value for the active model, filled from get_features
+        self._dim_cache: Dict[Tuple[str, str], float] = {}
+        # Knowledge base submission queue, drained in batches by a background task
+        # that is started on first use (it needs a running event loop)
+        self._kb_queue: Optional[asyncio.Queue] = None
+        self._kb_drainer: Optional[asyncio.Task] = None
         
         # Map tool names to methods
-        tool_methods = {
+        self._dispatch = {
             "open_model": self._open_model,
             "get_features": self._get_features,
             "modify_dimension": self._modify_dimension,
@@ -60,17 +98,38 @@ class SolidWorksTools:
             "create_drawing": self._create_drawing,
             "execute_feature_action": self._execute_feature_action,
         }
+
+    async def execute(
+        self, 
+        tool_name: str, 
+        arguments: Dict[str, Any], 
+        adapter: SolidWorksAdapter
+    ) -> Dict[str, Any]:
+        """
+        Execute a tool operation
+        
+        Args:
+            tool_name: Name of the tool to execute
+            arguments: Tool arguments
+            adapter: SolidWorks adapter instance
+            
+        Returns:
+            Result dictionary
+        """
+        logger.info(f"Executing tool: {tool_name} with args: {arguments}")
         
-        if tool_name not in tool_methods:
+        method = self._dispatch.get(tool_name)
+        if method is None:
             raise ValueError(f"Unknown tool: {tool_name}")
         
         # Execute the tool
         try:
-            result = await tool_methods[tool_name](arguments, adapter)
+            result = await method(arguments, adapter)
             
             # Store in knowledge base if successful
             if self.knowledge_base:
-                await self.knowledge_base.store_operation(
+                await self._submit_kb_write(
+                    "operation",
                     operation=tool_name,
                     context=arguments,
                     result=result,
@@ -81,9 +140,8 @@ class SolidWorksTools:
             # Add to history
             self._operation_history.append({
                 "tool": tool_name,
-                "arguments": arguments,
-                "result": result,
-                "success": result.get("success", True)
+                "success": result.get("success", True),
+                "timestamp": datetime.now().isoformat()
             })
             
             return result
@@ -99,7 +157,8 @@ class SolidWorksTools:
             
             # Store error in knowledge base
             if self.knowledge_base:
-                await self.knowledge_base.store_error_solution(
+                await self._submit_kb_write(
+                    "error_solution",
                     error_message=str(e),
                     error_context={"tool": tool_name, "arguments": arguments},
                     solution="Check the error message and verify inputs",
@@ -108,42 +167,98 @@ class SolidWorksTools:
             
             return error_result
 
+    async def _submit_kb_write(self, kind: str, **kwargs) -> None:
+        """
+        Queue a knowledge base write for the background drainer
+        
+        The tool result never depends on the write, so it is kept off the
+        request path. The record is serialized here, so later changes to
+        the arguments or result do not leak into it. Only waits when the
+        queue is full.
+        """
+        try:
+            record = self.knowledge_base.prepare_record(kind, **kwargs)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Skipping {kind} record that could not be serialized: {e}")
+            return
+        
+        if self._kb_queue is None:
+            self._kb_queue = asyncio.Queue(maxsize=_KB_QUEUE_SIZE)
+            self._kb_drainer = asyncio.create_task(self._drain_kb_writes())
+        
+        await self._kb_queue.put(record)
+
+    async def _drain_kb_writes(self) -> None:
+        """Store queued knowledge base writes, one store_prepared call per batch"""
+        queue = self._kb_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < _KB_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+            
+            try:
+                await self.knowledge_base.store_prepared(batch)
+            except Exception as e:
+                logger.error(f"Knowledge base write failed: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def wait_for_pending_writes(self) -> None:
+        """Wait until every queued knowledge base write has been stored"""
+        if self._kb_queue is not None:
+            await self._kb_queue.join()
+
+    async def close(self) -> None:
+        """Flush queued knowledge base writes and stop the background drainer"""
+        await self.wait_for_pending_writes()
+        if self._kb_drainer is not None:
+            self._kb_drainer.cancel()
+            try:
+                await self._kb_drainer
+            except asyncio.CancelledError:
+                pass
+            self._kb_drainer = None
+            self._kb_queue = None
+
     async def _open_model(self, args: Dict[str, Any], adapter: SolidWorksAdapter) -> Dict[str, Any]:
         """Open a SolidWorks model"""
         file_path = args["file_path"]
         
-        # Validate file exists
-        if not Path(file_path).exists():
+        # The adapter validates the path itself; checking here as well would
+        # cost an extra stat and still race with the actual open
+        self._dim_cache.clear()
+        try:
+            # Model info comes back with the open itself rather than as a
+            # second adapter round-trip
+            result = await adapter.open_document(file_path, include_info=True)
+        except FileNotFoundError:
             return {
                 "success": False,
                 "error": f"File not found: {file_path}"
             }
         
-        result = await adapter.open_document(file_path)
-        
-        # Add additional info
-        if result.get("success"):
-            model_info = await adapter.get_model_info()
-            result["model_info"] = model_info
-        
         return result
 
     async def _get_features(self, args: Dict[str, Any], adapter: SolidWorksAdapter) -> Dict[str, Any]:
         """Get all features from the active model"""
         features = await adapter.get_features()
+        self._index_dimensions(features)
+        
+        # Analyze features for insights in a single pass
+        feature_types = Counter()
+        suppressed_count = 0
+        for feature in features:
+            feature_types[feature.get("type", "Unknown")] += 1
+            if feature.get("suppressed", False):
+                suppressed_count += 1
         
-        # Analyze features for insights
         feature_summary = {
             "total_features": len(features),
-            "suppressed_count": sum(1 for f in features if f.get("suppressed", False)),
-            "feature_types": {}
+            "suppressed_count": suppressed_count,
+            "feature_types": dict(feature_types)
         }
         
-        for feature in features:
-            feature_type = feature.get("type", "Unknown")
-            feature_summary["feature_types"][feature_type] = \
-                feature_summary["feature_types"].get(feature_type, 0) + 1
-        
         return {
             "success": True,
             "features": features,
@@ -157,17 +272,16 @@ class SolidWorksTools:
         value = float(args["value"])
         
         # Store original value if possible
-        features = await adapter.get_features()
-        original_value = None
-        
-        for feature in features:
-            if feature["name"] == feature_name:
-                for dim in feature.get("dimensions", []):
-                    if dim["name"] == dimension_name:
-                        original_value = dim["value"]
-                        break
+        key = (feature_name, dimension_name)
+        original_value = self._dim_cache.get(key)
+        if original_value is None:
+            self._index_dimensions(await adapter.get_features())
+            original_value = self._dim_cache.get(key)
         
         success = await adapter.modify_dimension(feature_name, dimension_name, value)
+        if success:
+            # A rebuild can change driven and equation-linked dimensions too
+            self._dim_cache.clear()
         
         result = {
             "success": success,
@@ -189,7 +303,7 @@ class SolidWorksTools:
         parameters = args.get("parameters", {})
         
         # Validate macro file exists
-        if not Path(macro_path).exists():
+        if not os.path.exists(macro_path):
             return {
                 "success": False,
                 "error": f"Macro file not found: {macro_path}"
@@ -197,11 +311,13 @@ class SolidWorksTools:
         
         # Store macro pattern if successful
         result = await adapter.run_macro(macro_path, macro_name, parameters)
+        self._dim_cache.clear()
         
         if result.get("success") and self.knowledge_base:
             # Extract macro info for knowledge base
-            macro_info = Path(macro_path).stem
-            await self.knowledge_base.store_macro_pattern(
+            macro_info = os.path.splitext(os.path.basename(macro_path))[0]
+            await self._submit_kb_write(
+                "macro_pattern",
                 macro_name=macro_info,
                 description=f"Macro executed: {macro_name or 'main'}",
                 code_snippet="",  # Could read the macro file if needed
@@ -218,6 +334,7 @@ class SolidWorksTools:
         values = args["values"]
         
         success = await adapter.update_design_table(table_name, configuration, values)
+        self._dim_cache.clear()
         
         return {
             "success": success,
@@ -230,12 +347,17 @@ class SolidWorksTools:
     async def _export_model(self, args: Dict[str, Any], adapter: SolidWorksAdapter) -> Dict[str, Any]:
         """Export the model to various formats"""
         output_path = args["output_path"]
-        format = args["format"].upper()
+        format = sys.intern(args["format"].upper())
         options = args.get("options", {})
         
-        # Ensure output directory exists
-        output_dir = Path(output_path).parent
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # Reject unknown formats before touching the filesystem or SolidWorks
+        if format not in self._VALID_FORMATS:
+            return {
+                "success": False,
+                "error": f"Unsupported export format: {format}"
+            }
+        
+        _ensure_parent_dir(output_path)
         
         success = await adapter.export_file(output_path, format, options)
         
@@ -245,9 +367,10 @@ class SolidWorksTools:
             "format": format
         }
         
-        if success and Path(output_path).exists():
-            result["file_size"] = Path(output_path).stat().st_size
-            result["file_size_mb"] = round(result["file_size"] / (1024 * 1024), 2)
+        st = _safe_stat(output_path) if success else None
+        if st:
+            result["file_size"] = st.st_size
+            result["file_size_mb"] = round(st.st_size / (1024 * 1024), 2)
         
         return result
 
@@ -270,6 +393,7 @@ class SolidWorksTools:
         force = args.get("force", False)
         
         success, errors = await adapter.rebuild_model(force)
+        self._dim_cache.clear()
         
         return {
             "success": success,
@@ -284,9 +408,7 @@ class SolidWorksTools:
         width = args.get("width", 1920)
         height = args.get("height", 1080)
         
-        # Ensure output directory exists
-        output_dir = Path(output_path).parent
-        output_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_parent_dir(output_path)
         
         success = await adapter.take_screenshot(output_path, width, height)
         
@@ -296,8 +418,9 @@ class SolidWorksTools:
             "resolution": f"{width}x{height}"
         }
         
-        if success and Path(output_path).exists():
-            result["file_size"] = Path(output_path).stat().st_size
+        st = _safe_stat(output_path) if success else None
+        if st:
+            result["file_size"] = st.st_size
         
         return result
 
@@ -346,6 +469,7 @@ class SolidWorksTools:
         config_name = args["configuration_name"]
         
         success = await adapter.activate_configuration(config_name)
+        self._dim_cache.clear()
         
         return {
             "success": success,
@@ -380,6 +504,7 @@ class SolidWorksTools:
         parameters = args.get("parameters", {})
         
         result = await adapter.execute_feature_action(feature_name, action, parameters)
+        self._dim_cache.clear()
         
         return {
             "success": result is not None,
@@ -388,30 +513,42 @@ class SolidWorksTools:
             "result": result
         }
 
+    def _index_dimensions(self, features: List[Dict[str, Any]]):
+        """Rebuild the dimension value cache from a features list, skipping incomplete entries"""
+        dim_cache = {}
+        for feature in features:
+            feature_name = feature.get("name")
+            if feature_name is None:
+                continue
+            for dim in feature.get("dimensions") or []:
+                dim_name = dim.get("name")
+                dim_value = dim.get("value")
+                if dim_name is not None and dim_value is not None:
+                    dim_cache[(feature_name, dim_name)] = dim_value
+        self._dim_cache = dim_cache
+
+    def clear_dimension_cache(self):
+        """Forget cached dimension values, e.g. when the adapter or document changes"""
+        self._dim_cache.clear()
+
     def _generate_tags(self, tool_name: str, arguments: Dict[str, Any]) -> List[str]:
         """Generate tags for knowledge base storage"""
         tags = [tool_name]
         
         # Add file type tags
-        if "file_path" in arguments:
-            ext = Path(arguments["file_path"]).suffix.lower()
-            if ext == ".sldprt":
-                tags.append("part")
-            elif ext == ".sldasm":
-                tags.append("assembly")
-            elif ext == ".slddrw":
-                tags.append("drawing")
+        file_path = arguments.get("file_path")
+        if file_path:
+            file_tag = self._EXT_TAGS.get(_suffix(file_path))
+            if file_tag:
+                tags.append(file_tag)
         
         # Add operation type tags
-        if tool_name in ["modify_dimension", "update_design_table"]:
-            tags.append("parametric")
-        elif tool_name in ["export_model", "take_screenshot"]:
-            tags.append("export")
-        elif tool_name == "run_macro":
-            tags.append("automation")
+        op_tag = self._OP_TAGS.get(tool_name)
+        if op_tag:
+            tags.append(op_tag)
         
         return tags
 
     def get_operation_history(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent operation history"""
-        return self._operation_history[-limit:]
\ No newline at end of file
+        return list(self._operation_history)[-limit:]
\ No newline at end of file
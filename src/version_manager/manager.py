@@ -5,23 +5,226 @@ Detects and manages different SolidWorks versions installed on the system.
 """
 
 import os
+import asyncio
+import copy
 import logging
 import platform
-from typing import Dict, List, Optional, Tuple
-from pathlib import Path
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Scan results shared by every VersionManager in the process: (monotonic time, version_info)
+_SCAN_CACHE: Optional[Tuple[float, Dict[str, Dict[str, Any]]]] = None
+_CACHE_TTL = 300
+
+# Scan results persisted across process runs, validated against each executable's mtime
+# and a listing of the install folders and registry keys (so new installs are picked up).
+# Validation still costs a listdir per base path, one registry enumeration and a stat per
+# cached executable; a hit saves the per-version probes, DLL lookups and registry reads.
+_DISK_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "mcp-sw", "versions.json")
+_DISK_CACHE_MAX_AGE = 24 * 60 * 60
+
+_SUPPORTED_VERSIONS = ("2021", "2022", "2023", "2024", "2025")
+
+# Extracts the version from a SLDWORKS.exe install path
+_VERSION_RE = re.compile(r"SOLIDWORKS (" + "|".join(_SUPPORTED_VERSIONS) + r")")
+
+# How long a process scan result stays valid, in seconds
+_RUNNING_INSTANCE_TTL = 2.0
+
+# How long a validate_version result is reused before the files are checked again, in seconds
+_VALIDATION_TTL = 30.0
+
+# Compatibility details per supported version. Values are immutable, so
+# get_compatibility_info can hand out shallow copies
+_COMPATIBILITY_TABLE = {
+    "2021": {
+        "python_net": "3.0.0+",
+        "dotnet_framework": "4.8",
+        "windows_versions": ("Windows 10", "Windows 11"),
+        "api_version": "28.0"
+    },
+    "2022": {
+        "python_net": "3.0.0+",
+        "dotnet_framework": "4.8",
+        "windows_versions": ("Windows 10", "Windows 11"),
+        "api_version": "29.0"
+    },
+    "2023": {
+        "python_net": "3.0.0+",
+        "dotnet_framework": "4.8",
+        "windows_versions": ("Windows 10", "Windows 11"),
+        "api_version": "30.0"
+    },
+    "2024": {
+        "python_net": "3.0.0+",
+        "dotnet_framework": "4.8",
+        "windows_versions": ("Windows 10", "Windows 11"),
+        "api_version": "31.0"
+    },
+    "2025": {
+        "python_net": "3.0.0+",
+        "dotnet_framework": "4.8",
+        "windows_versions": ("Windows 10", "Windows 11"),
+        "api_version": "32.0"
+    }
+}
+
+# Common installation paths
+_BASE_PATHS = (
+    r"C:\Program Files\SOLIDWORKS Corp",
+    r"C:\Program Files (x86)\SOLIDWORKS Corp",
+    r"D:\Program Files\SOLIDWORKS Corp",
+)
+
 
 class VersionManager:
     """Manages SolidWorks version detection and compatibility"""
 
-    def __init__(self):
-        self.supported_versions = ["2021", "2022", "2023", "2024", "2025"]
+    def __init__(self, load: bool = True):
+        self.supported_versions = list(_SUPPORTED_VERSIONS)
         self.version_info: Dict[str, Dict[str, Any]] = {}
+        # Newest entry in version_info and per-version lookups derived from it,
+        # kept in step by _set_version_info
+        self._newest_installed: Optional[str] = None
+        self._api_dlls_by_version: Dict[str, Dict[str, str]] = {}
+        self._exe_by_version: Dict[str, Optional[str]] = {}
         self._detected_version: Optional[str] = None
-        self._scan_for_versions()
+        # (monotonic time, result) of the last process scan
+        self._running_instance_cache: Optional[Tuple[float, Optional[str]]] = None
+        # version -> (monotonic time, validation result)
+        self._validation_cache: Dict[str, Tuple[float, Tuple[bool, str]]] = {}
+        # Async callers pass load=False and await load_async() instead
+        if load:
+            self._load_versions()
+
+    def _load_versions(self):
+        """Populate version_info from the process or disk cache, scanning only on a miss"""
+        global _SCAN_CACHE
+        
+        if _SCAN_CACHE and time.monotonic() - _SCAN_CACHE[0] < _CACHE_TTL:
+            self._set_version_info(copy.deepcopy(_SCAN_CACHE[1]))
+            return
+        
+        cached = self._read_disk_cache()
+        if cached is not None:
+            self._set_version_info(cached)
+        else:
+            self._scan_for_versions()
+            if self.version_info:
+                self._write_disk_cache()
+        
+        _SCAN_CACHE = (time.monotonic(), copy.deepcopy(self.version_info))
+
+    async def load_async(self):
+        """Populate version_info like _load_versions, without blocking the event loop"""
+        global _SCAN_CACHE
+        
+        if _SCAN_CACHE and time.monotonic() - _SCAN_CACHE[0] < _CACHE_TTL:
+            self._set_version_info(copy.deepcopy(_SCAN_CACHE[1]))
+            return
+        
+        cached = await asyncio.to_thread(self._read_disk_cache)
+        if cached is not None:
+            self._set_version_info(cached)
+            _SCAN_CACHE = (time.monotonic(), copy.deepcopy(self.version_info))
+        else:
+            await self.scan_async()
+
+    def _set_version_info(self, version_info: Dict[str, Dict[str, Any]]):
+        """Replace the scan results and the lookups derived from them"""
+        self.version_info = version_info
+        self._newest_installed = max(version_info, default=None)
+        self._api_dlls_by_version = {
+            version: info.get("api_dlls", {}) for version, info in version_info.items()
+        }
+        self._exe_by_version = {version: info.get("exe") for version, info in version_info.items()}
+        self._detected_version = None
+        self._validation_cache.clear()
+
+    def _read_disk_cache(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Read persisted scan results if they are fresh and no executable has changed"""
+        try:
+            with open(_DISK_CACHE_PATH, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        if not isinstance(data, dict):
+            return None
+        if data.get("system") != platform.system():
+            return None
+        if time.time() - data.get("scanned_at", 0) > _DISK_CACHE_MAX_AGE:
+            return None
+        if data.get("install_fingerprint") != self._install_fingerprint():
+            return None
+        
+        version_details = data.get("version_details", {})
+        exe_mtimes = data.get("exe_mtimes", {})
+        for version, info in version_details.items():
+            try:
+                if os.stat(info["exe"]).st_mtime != exe_mtimes.get(version):
+                    return None
+            except (OSError, KeyError):
+                return None
+        
+        return version_details
+
+    def _write_disk_cache(self):
+        """Persist scan results using the export_version_info schema plus change markers"""
+        if platform.system() != "Windows":
+            return
+        
+        try:
+            exe_mtimes = {
+                version: os.stat(info["exe"]).st_mtime
+                for version, info in self.version_info.items()
+            }
+            os.makedirs(os.path.dirname(_DISK_CACHE_PATH), exist_ok=True)
+            with open(_DISK_CACHE_PATH, 'w') as f:
+                json.dump({
+                    "installed_versions": self.get_installed_versions(),
+                    "version_details": self.version_info,
+                    "system": platform.system(),
+                    "scanned_at": time.time(),
+                    "exe_mtimes": exe_mtimes,
+                    "install_fingerprint": self._install_fingerprint()
+                }, f)
+        except OSError as e:
+            logger.debug(f"Could not write version cache: {e}")
+
+    def _install_fingerprint(self) -> List[str]:
+        """List SolidWorks install folders and registry keys, to spot added or removed installs"""
+        entries = []
+        for base_path in _BASE_PATHS:
+            try:
+                names = os.listdir(base_path)
+            except OSError:
+                continue
+            entries.extend(
+                os.path.join(base_path, name) for name in names if name.startswith("SOLIDWORKS ")
+            )
+        
+        try:
+            import winreg
+            
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\SolidWorks") as base_key:
+                subkey_count = winreg.QueryInfoKey(base_key)[0]
+                entries.extend(
+                    "registry:" + winreg.EnumKey(base_key, i) for i in range(subkey_count)
+                )
+        except (ImportError, OSError):
+            pass
+        
+        return sorted(entries)
 
     def _scan_for_versions(self):
         """Scan system for installed SolidWorks versions"""
@@ -30,81 +233,115 @@ class VersionManager:
         else:
             logger.warning("SolidWorks version detection only supported on Windows")
 
+    async def scan_async(self):
+        """
+        Rescan for installed versions without blocking the event loop
+        
+        The base paths and the registry are scanned concurrently in worker
+        threads; results are merged on the loop in the same order as the
+        synchronous scan, so later sources still take precedence.
+        """
+        global _SCAN_CACHE
+        
+        if platform.system() != "Windows":
+            logger.warning("SolidWorks version detection only supported on Windows")
+            return
+        
+        results = await asyncio.gather(
+            *[asyncio.to_thread(self._scan_base_path, base_path) for base_path in _BASE_PATHS],
+            asyncio.to_thread(self._scan_registry)
+        )
+        
+        version_info: Dict[str, Dict[str, Any]] = {}
+        for found in results:
+            version_info.update(found)
+        self._set_version_info(version_info)
+        
+        _SCAN_CACHE = (time.monotonic(), copy.deepcopy(self.version_info))
+        if self.version_info:
+            await asyncio.to_thread(self._write_disk_cache)
+
     def _scan_windows(self):
         """Scan Windows system for SolidWorks installations"""
-        # Common installation paths
-        base_paths = [
-            r"C:\Program Files\SOLIDWORKS Corp",
-            r"C:\Program Files (x86)\SOLIDWORKS Corp",
-            r"D:\Program Files\SOLIDWORKS Corp",
-        ]
-        
-        for base_path in base_paths:
-            if not Path(base_path).exists():
-                continue
-                
-            for version in self.supported_versions:
-                sw_path = Path(base_path) / f"SOLIDWORKS {version}"
-                if sw_path.exists():
-                    self._register_version(version, sw_path)
+        version_info = dict(self.version_info)
+        for base_path in _BASE_PATHS:
+            version_info.update(self._scan_base_path(base_path))
         
         # Also check registry
-        self._scan_registry()
+        version_info.update(self._scan_registry())
+        self._set_version_info(version_info)
 
-    def _scan_registry(self):
+    def _scan_base_path(self, base_path: str) -> Dict[str, Dict[str, Any]]:
+        """Scan one installation base path for SolidWorks versions"""
+        found: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(base_path):
+            return found
+            
+        for version in self.supported_versions:
+            sw_path = os.path.join(base_path, f"SOLIDWORKS {version}")
+            if os.path.exists(sw_path):
+                self._register_version(version, sw_path, found)
+        
+        return found
+
+    def _scan_registry(self) -> Dict[str, Dict[str, Any]]:
         """Scan Windows registry for SolidWorks installations"""
+        found: Dict[str, Dict[str, Any]] = {}
         try:
             import winreg
             
             registry_base = r"SOFTWARE\SolidWorks"
+            version_keys = {f"SOLIDWORKS {v}": v for v in self.supported_versions}
             
             try:
                 with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, registry_base) as base_key:
-                    i = 0
-                    while True:
-                        try:
-                            subkey_name = winreg.EnumKey(base_key, i)
-                            if subkey_name.startswith("SOLIDWORKS"):
-                                # Extract version
-                                parts = subkey_name.split()
-                                if len(parts) > 1 and parts[1] in self.supported_versions:
-                                    version = parts[1]
-                                    
-                                    # Get installation path
-                                    with winreg.OpenKey(base_key, subkey_name) as version_key:
-                                        try:
-                                            install_path = winreg.QueryValueEx(
-                                                version_key, 
-                                                "SolidWorks Folder"
-                                            )[0]
-                                            self._register_version(version, Path(install_path))
-                                        except WindowsError:
-                                            pass
-                            i += 1
-                        except WindowsError:
-                            break
+                    subkey_count = winreg.QueryInfoKey(base_key)[0]
+                    for i in range(subkey_count):
+                        subkey_name = winreg.EnumKey(base_key, i)
+                        version = version_keys.get(subkey_name)
+                        if version is None:
+                            continue
+                        
+                        # Get installation path
+                        with winreg.OpenKey(base_key, subkey_name) as version_key:
+                            try:
+                                install_path = winreg.QueryValueEx(
+                                    version_key, 
+                                    "SolidWorks Folder"
+                                )[0]
+                                self._register_version(version, install_path, found)
+                            except WindowsError:
+                                pass
             except WindowsError:
                 logger.debug("SolidWorks registry key not found")
                 
         except ImportError:
             logger.warning("winreg module not available")
+        
+        return found
 
-    def _register_version(self, version: str, install_path: Path):
-        """Register a detected SolidWorks version"""
-        exe_path = install_path / "SLDWORKS.exe"
+    def _register_version(
+        self, 
+        version: str, 
+        install_path: str, 
+        found: Dict[str, Dict[str, Any]]
+    ):
+        """Register a detected SolidWorks version into the given scan results"""
+        install_path = os.path.normpath(install_path)
+        exe_path = os.path.join(install_path, "SLDWORKS.exe")
         
-        if exe_path.exists():
-            self.version_info[version] = {
-                "path": str(install_path),
-                "exe": str(exe_path),
+        if os.path.exists(exe_path):
+            found[version] = {
+                "path": install_path,
+                "exe": exe_path,
                 "api_dlls": self._find_api_dlls(install_path),
                 "detected": True
             }
             logger.info(f"Detected SolidWorks {version} at {install_path}")
 
-    def _find_api_dlls(self, install_path: Path) -> Dict[str, str]:
+    def _find_api_dlls(self, install_path: str) -> Dict[str, str]:
         """Find API DLL files for a SolidWorks installation"""
-        api_path = install_path / "api" / "redist"
+        api_path = os.path.join(install_path, "api", "redist")
         dlls = {}
         
         required_dlls = [
@@ -114,14 +351,14 @@ class VersionManager:
         ]
         
         for dll_name in required_dlls:
-            dll_path = api_path / dll_name
-            if dll_path.exists():
-                dlls[dll_name] = str(dll_path)
+            dll_path = os.path.join(api_path, dll_name)
+            if os.path.exists(dll_path):
+                dlls[dll_name] = dll_path
             else:
                 # Try alternate locations
-                alt_path = install_path / dll_name
-                if alt_path.exists():
-                    dlls[dll_name] = str(alt_path)
+                alt_path = os.path.join(install_path, dll_name)
+                if os.path.exists(alt_path):
+                    dlls[dll_name] = alt_path
         
         return dlls
 
@@ -132,6 +369,10 @@ class VersionManager:
         Returns:
             Version string or None if not detected
         """
+        # The decision only changes when the scan results are replaced
+        if self._detected_version:
+            return self._detected_version
+        
         # Check environment variable first
         env_version = os.getenv("SOLIDWORKS_VERSION")
         if env_version and env_version in self.supported_versions:
@@ -145,18 +386,21 @@ class VersionManager:
             return running_version
         
         # Return newest installed version
-        if self.version_info:
-            newest = max(self.version_info.keys())
-            self._detected_version = newest
-            return newest
-        
-        return None
+        self._detected_version = self._newest_installed
+        return self._newest_installed
 
     def _detect_running_instance(self) -> Optional[str]:
         """Detect version of running SolidWorks instance"""
         if platform.system() != "Windows":
             return None
-            
+        
+        # Enumerating processes is expensive; reuse a very recent result
+        now = time.monotonic()
+        if (self._running_instance_cache
+                and now - self._running_instance_cache[0] < _RUNNING_INSTANCE_TTL):
+            return self._running_instance_cache[1]
+        
+        running_version = None
         try:
             import psutil
             
@@ -165,15 +409,17 @@ class VersionManager:
                     exe_path = proc.info['exe']
                     if exe_path:
                         # Extract version from path
-                        for version in self.supported_versions:
-                            if f"SOLIDWORKS {version}" in exe_path:
-                                return version
+                        match = _VERSION_RE.search(exe_path)
+                        if match:
+                            running_version = match.group(1)
+                            break
         except ImportError:
             logger.debug("psutil not available for process detection")
         except Exception as e:
             logger.debug(f"Error detecting running instance: {e}")
         
-        return None
+        self._running_instance_cache = (now, running_version)
+        return running_version
 
     def get_version_info(self, version: str) -> Optional[Dict[str, Any]]:
         """Get information about a specific version"""
@@ -189,16 +435,27 @@ class VersionManager:
 
     def get_api_dlls(self, version: str) -> Dict[str, str]:
         """Get API DLL paths for a version"""
-        info = self.get_version_info(version)
-        if info:
-            return info.get("api_dlls", {})
-        return {}
+        return dict(self._api_dlls_by_version.get(version, {}))
 
     def get_exe_path(self, version: str) -> Optional[str]:
         """Get SolidWorks executable path for a version"""
-        info = self.get_version_info(version)
-        if info:
-            return info.get("exe")
+        return self._exe_by_version.get(version)
+
+    def _validation_precheck(self, version: str) -> Optional[Tuple[bool, str]]:
+        """Return a failed validation result if the version is unsupported or not installed"""
+        if version not in self.supported_versions:
+            return False, f"Version {version} is not supported"
+        
+        if not self.is_version_installed(version):
+            return False, f"Version {version} is not installed"
+        
+        return None
+
+    def _cached_validation(self, version: str) -> Optional[Tuple[bool, str]]:
+        """Return a recent validation result for the version, if there is one"""
+        cached = self._validation_cache.get(version)
+        if cached and time.monotonic() - cached[0] < _VALIDATION_TTL:
+            return cached[1]
         return None
 
     def validate_version(self, version: str) -> Tuple[bool, str]:
@@ -208,29 +465,37 @@ class VersionManager:
         Returns:
             Tuple of (is_valid, message)
         """
-        if version not in self.supported_versions:
-            return False, f"Version {version} is not supported"
+        precheck = self._validation_precheck(version)
+        if precheck:
+            return precheck
         
-        if not self.is_version_installed(version):
-            return False, f"Version {version} is not installed"
+        # Health checks poll this; only touch the filesystem once per TTL
+        cached = self._cached_validation(version)
+        if cached:
+            return cached
         
+        result = self._check_installation(version)
+        self._validation_cache[version] = (time.monotonic(), result)
+        return result
+
+    def _check_installation(self, version: str) -> Tuple[bool, str]:
+        """Check the executable and API DLLs of an installed version"""
         info = self.get_version_info(version)
         
         # Check executable
         exe_path = info.get("exe")
-        if not exe_path or not Path(exe_path).exists():
+        if not exe_path or not os.path.exists(exe_path):
             return False, f"SolidWorks executable not found for version {version}"
         
-        # Check API DLLs
+        # Check API DLLs, stopping at the first missing one
         api_dlls = info.get("api_dlls", {})
-        missing_dlls = []
+        missing_dll = next(
+            (dll_name for dll_name, dll_path in api_dlls.items() if not os.path.exists(dll_path)),
+            None
+        )
         
-        for dll_name, dll_path in api_dlls.items():
-            if not Path(dll_path).exists():
-                missing_dlls.append(dll_name)
-        
-        if missing_dlls:
-            return False, f"Missing API DLLs for version {version}: {', '.join(missing_dlls)}"
+        if missing_dll:
+            return False, f"Missing API DLL for version {version}: {missing_dll}"
         
         return True, f"Version {version} is properly installed"
 
@@ -244,44 +509,16 @@ class VersionManager:
             "platform": platform.platform()
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        if orjson is not None:
+            payload = orjson.dumps(export_data, option=orjson.OPT_INDENT_2)
+            with open(output_path, 'wb') as f:
+                f.write(payload)
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(export_data, f, indent=2)
         
         logger.info(f"Exported version info to {output_path}")
 
     def get_compatibility_info(self, version: str) -> Dict[str, Any]:
         """Get compatibility information for a version"""
-        compatibility = {
-            "2021": {
-                "python_net": "3.0.0+",
-                "dotnet_framework": "4.8",
-                "windows_versions": ["Windows 10", "Windows 11"],
-                "api_version": "28.0"
-            },
-            "2022": {
-                "python_net": "3.0.0+",
-                "dotnet_framework": "4.8",
-                "windows_versions": ["Windows 10", "Windows 11"],
-                "api_version": "29.0"
-            },
-            "2023": {
-                "python_net": "3.0.0+",
-                "dotnet_framework": "4.8",
-                "windows_versions": ["Windows 10", "Windows 11"],
-                "api_version": "30.0"
-            },
-            "2024": {
-                "python_net": "3.0.0+",
-                "dotnet_framework": "4.8",
-                "windows_versions": ["Windows 10", "Windows 11"],
-                "api_version": "31.0"
-            },
-            "2025": {
-                "python_net": "3.0.0+",
-                "dotnet_framework": "4.8",
-                "windows_versions": ["Windows 10", "Windows 11"],
-                "api_version": "32.0"
-            }
-        }
-        
-        return compatibility.get(version, {})
\ No newline at end of file
+        return dict(_COMPATIBILITY_TABLE.get(version, {}))
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Shared pytest configuration for the SolidWorks MCP tests
+"""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.solidworks_adapters.common.base_adapter import SolidWorksAdapter
+
+# Recording adapters built up front; enough for the tests that run at once
+_ADAPTER_POOL_SIZE = 4
+
+
+def pytest_configure(config):
+    """Run the async tests on uvloop when it is available"""
+    # pytest-asyncio-cooperative creates its loop from the current policy, so
+    # the policy has to be in place before the run starts. uvloop has no
+    # Windows build; there the default loop is used.
+    try:
+        import uvloop
+    except ImportError:
+        return
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+@pytest.fixture(scope="session")
+def adapter_pool():
+    """AsyncMock adapters built once at session start and reused by pooled_adapter"""
+    return [AsyncMock(spec=SolidWorksAdapter) for _ in range(_ADAPTER_POOL_SIZE)]
+
+
+@pytest.fixture
+def pooled_adapter(adapter_pool):
+    """An AsyncMock adapter of the test's own, returned to the pool cleared afterwards"""
+    adapter = adapter_pool.pop() if adapter_pool else AsyncMock(spec=SolidWorksAdapter)
+    yield adapter
+    adapter.reset_mock(return_value=True, side_effect=True)
+    adapter_pool.append(adapter)
@@ -4,59 +4,187 @@ Tests for SolidWorks MCP Server
 
 import pytest
 import asyncio
-import json
-from unittest.mock import Mock, AsyncMock, patch
-from pathlib import Path
+import os
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, Final
 
 from src.mcp_host.server import SolidWorksMCPServer
 from src.tools.solidworks_tools import SolidWorksTools
 from src.context_builder.builder import SolidWorksContextBuilder
-from src.solidworks_adapters.common.base_adapter import SolidWorksAdapter
+from src.context_builder.knowledge_base import SolidWorksKnowledgeBase
 
+# Inputs shared by several tests
+PART_PATH: Final = "C:/test.sldprt"
+PART_ARGS: Final = {"file_path": PART_PATH}
+STEP_OUT: Final = "C:/export/test.step"
+EXTRUDE_FEATURE: Final = {"name": "Extrude1", "type": "Extrusion", "suppressed": False}
+# stat result for files that exist in fake_fs: a 1024000-byte regular file
+FAKE_STAT: Final = os.stat_result((0o100644, 0, 0, 1, 0, 0, 1024000, 0, 0, 0))
 
-@pytest.fixture
-def mock_adapter():
-    """Create a mock SolidWorks adapter"""
-    adapter = Mock(spec=SolidWorksAdapter)
-    adapter.connected = True
-    adapter.get_model_info = AsyncMock(return_value={
+
+def _contains_all(*fragments: str) -> "re.Pattern[str]":
+    """Compile one pattern that matches text containing every fragment, in any order"""
+    return re.compile("".join(f"(?=.*{re.escape(fragment)})" for fragment in fragments), re.S)
+
+
+# Expected fragments of built contexts, checked with a single search each
+MODEL_CONTEXT_PAT: Final = _contains_all("Model: TestPart", "Type: Part", "Features Summary:")
+ANALYSIS_CONTEXT_PAT: Final = _contains_all("part file", "Analysis should cover:")
+FEATURE_SUMMARY_PAT: Final = _contains_all(
+    "Total features: 4", "Extrusion: 2", "Suppressed features: 1"
+)
+
+
+# What every adapter returns unless a test primes something else
+DEFAULT_RETURNS: Final = {
+    "get_model_info": {
         "title": "TestPart",
         "type": "Part",
-        "path": "C:/test.sldprt"
-    })
-    adapter.get_features = AsyncMock(return_value=[
-        {"name": "Extrude1", "type": "Extrusion", "suppressed": False}
-    ])
-    return adapter
+        "path": PART_PATH
+    },
+    "get_features": [EXTRUDE_FEATURE],
+    "get_configurations": [],
+    "get_mass_properties": {},
+}
+
+
+class _StubAdapter:
+    """
+    Lightweight adapter double for tests that do not assert on calls
+    
+    Each method returns the value primed for it in `returns`, or raises it
+    if it is an exception. Unlike a Mock, nothing is recorded per call.
+    """
+
+    connected = True
+
+    def __init__(self):
+        self.returns: Dict[str, Any] = {}
+        self.reset()
+
+    def reset(self):
+        """Go back to the default returns"""
+        self.returns = dict(DEFAULT_RETURNS)
+
+    def _result(self, method_name: str) -> Any:
+        value = self.returns.get(method_name)
+        if isinstance(value, BaseException):
+            raise value
+        return value
+
+    async def open_document(self, file_path, include_info=False):
+        return self._result("open_document")
+
+    async def get_model_info(self):
+        return self._result("get_model_info")
+
+    async def get_features(self):
+        return self._result("get_features")
+
+    async def get_configurations(self):
+        return self._result("get_configurations")
+
+    async def get_mass_properties(self):
+        return self._result("get_mass_properties")
+
+    async def modify_dimension(self, feature_name, dimension_name, value):
+        return self._result("modify_dimension")
+
+    async def export_file(self, output_path, format, options=None):
+        return self._result("export_file")
+
+
+def _prime_adapter(adapter, **returns):
+    """Set the return values of several stub adapter methods at once"""
+    adapter.returns.update(returns)
+
+
+def _prime_recording_defaults(adapter):
+    """Apply DEFAULT_RETURNS to a recording AsyncMock adapter"""
+    adapter.connected = True
+    for method_name, value in DEFAULT_RETURNS.items():
+        getattr(adapter, method_name).return_value = value
+
+
+@pytest.fixture(scope="session")
+async def _shared_adapter():
+    """Create one stub SolidWorks adapter for the whole session"""
+    yield _StubAdapter(), asyncio.Lock()
 
 
 @pytest.fixture
-async def mcp_server():
-    """Create MCP server instance"""
-    server = SolidWorksMCPServer()
-    yield server
+async def mock_adapter(_shared_adapter):
+    """Shared stub adapter, held by one test at a time and reset afterwards"""
+    adapter, adapter_lock = _shared_adapter
+    async with adapter_lock:
+        yield adapter
+        adapter.reset()
+
+
+@pytest.fixture
+def mock_adapter_recording(pooled_adapter):
+    """AsyncMock adapter with the default returns, for tests that assert on calls"""
+    _prime_recording_defaults(pooled_adapter)
+    return pooled_adapter
+
+
+@pytest.fixture(scope="module", autouse=True)
+def fake_fs(module_mocker):
+    """
+    Fake filesystem for the tools module
+    
+    Paths added to fake_fs.existing stat as 1024000-byte files; nothing else exists
+    and output directories are never created.
+    """
+    fs = SimpleNamespace(existing=set())
+    module_mocker.patch(
+        "src.tools.solidworks_tools._safe_stat",
+        new=lambda path: FAKE_STAT if path in fs.existing else None
+    )
+    module_mocker.patch("src.tools.solidworks_tools._ensure_parent_dir", new=lambda path: None)
+    return fs
+
+
+@pytest.fixture(scope="session")
+async def _shared_mcp_server():
+    """Create one MCP server instance for the whole session"""
+    server = SolidWorksMCPServer(test_mode=True)
+    yield server, asyncio.Lock()
     await server.cleanup()
 
 
+@pytest.fixture
+async def mcp_server(_shared_mcp_server):
+    """Shared MCP server, held by one test at a time and reset afterwards"""
+    server, server_lock = _shared_mcp_server
+    # Cooperative tests interleave on one loop; the lock keeps one test's
+    # current_adapter from leaking into another while both are running
+    async with server_lock:
+        yield server
+        server.current_adapter = None
+
+
 class TestMCPServer:
     """Test MCP server functionality"""
 
-    @pytest.mark.asyncio
-    async def test_list_tools(self, mcp_server):
-        """Test listing available tools"""
-        tools = await mcp_server.server.list_tools()
-        
-        assert len(tools) > 0
-        tool_names = [tool.name for tool in tools]
+    @pytest.mark.asyncio_cooperative
+    async def test_list_registrations(self, mcp_server):
+        """Test listing available tools and prompts"""
+        tools, prompts = await asyncio.gather(
+            mcp_server.server.list_tools(),
+            mcp_server.server.list_prompts()
+        )
         
-        # Check essential tools are present
-        assert "open_model" in tool_names
-        assert "get_features" in tool_names
-        assert "modify_dimension" in tool_names
-        assert "run_macro" in tool_names
-        assert "update_design_table" in tool_names
-
-    @pytest.mark.asyncio
+        # Check essential tools and prompts are present
+        assert {
+            "open_model", "get_features", "modify_dimension", "run_macro", "update_design_table"
+        } <= {tool.name for tool in tools}
+        assert {
+            "analyze_model", "optimize_design", "create_variants"
+        } <= {prompt.name for prompt in prompts}
+
+    @pytest.mark.asyncio_cooperative
     async def test_tool_execution(self, mcp_server, mock_adapter):
         """Test tool execution"""
         mcp_server.current_adapter = mock_adapter
@@ -69,33 +197,17 @@ class TestMCPServer:
         assert len(result) > 0
         assert result[0].type == "text"
         
-        # Parse result
-        data = json.loads(result[0].text)
+        # Result dict as serialized into the text payload
+        data = result[0].raw
         assert data["success"] == True
         assert "model_info" in data
 
-    @pytest.mark.asyncio
-    async def test_list_prompts(self, mcp_server):
-        """Test listing available prompts"""
-        prompts = await mcp_server.server.list_prompts()
-        
-        assert len(prompts) > 0
-        prompt_names = [prompt.name for prompt in prompts]
-        
-        # Check essential prompts
-        assert "analyze_model" in prompt_names
-        assert "optimize_design" in prompt_names
-        assert "create_variants" in prompt_names
-
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio_cooperative
     async def test_context_building(self, mcp_server, mock_adapter):
         """Test context building for prompts"""
         mcp_server.current_adapter = mock_adapter
         
-        prompt_msg = await mcp_server.server.get_prompt(
-            "analyze_model",
-            {"file_path": "C:/test.sldprt"}
-        )
+        prompt_msg = await mcp_server.server.get_prompt("analyze_model", PART_ARGS)
         
         assert prompt_msg.role == "user"
         assert prompt_msg.content.type == "text"
@@ -105,52 +217,52 @@ class TestMCPServer:
 class TestSolidWorksTools:
     """Test SolidWorks tools implementation"""
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def tools(self):
-        """Create tools instance"""
+        """Create one tools instance for the module"""
         return SolidWorksTools()
 
-    @pytest.mark.asyncio
-    async def test_open_model_success(self, tools, mock_adapter):
-        """Test successful model opening"""
-        mock_adapter.open_document = AsyncMock(return_value={
-            "success": True,
-            "document_type": "Part"
-        })
-        
-        with patch("pathlib.Path.exists", return_value=True):
-            result = await tools._open_model(
-                {"file_path": "C:/test.sldprt"},
-                mock_adapter
+    @pytest.mark.asyncio_cooperative
+    @pytest.mark.parametrize("exists,expected", [(True, True), (False, False)])
+    async def test_open_model(self, tools, mock_adapter_recording, exists, expected):
+        """Test opening an existing and a non-existent model"""
+        adapter = mock_adapter_recording
+        if exists:
+            adapter.open_document.return_value = {
+                "success": True,
+                "document_type": "Part",
+                "model_info": {"title": "test.sldprt"}
+            }
+        else:
+            adapter.open_document.side_effect = FileNotFoundError(
+                f"File not found: {PART_PATH}"
             )
         
-        assert result["success"] == True
-        assert "model_info" in result
-
-    @pytest.mark.asyncio
-    async def test_open_model_file_not_found(self, tools, mock_adapter):
-        """Test opening non-existent file"""
-        with patch("pathlib.Path.exists", return_value=False):
-            result = await tools._open_model(
-                {"file_path": "C:/nonexistent.sldprt"},
-                mock_adapter
-            )
+        result = await tools._open_model(PART_ARGS, adapter)
         
-        assert result["success"] == False
-        assert "File not found" in result["error"]
+        assert result["success"] == expected
+        if exists:
+            assert "model_info" in result
+            adapter.open_document.assert_awaited_once_with(PART_PATH, include_info=True)
+            adapter.get_model_info.assert_not_called()
+        else:
+            assert "File not found" in result["error"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio_cooperative
     async def test_modify_dimension(self, tools, mock_adapter):
         """Test dimension modification"""
-        mock_adapter.get_features = AsyncMock(return_value=[
-            {
-                "name": "Extrude1",
-                "dimensions": [
-                    {"name": "D1@Extrude1", "value": 10.0}
-                ]
-            }
-        ])
-        mock_adapter.modify_dimension = AsyncMock(return_value=True)
+        _prime_adapter(
+            mock_adapter,
+            get_features=[
+                {
+                    "name": "Extrude1",
+                    "dimensions": [
+                        {"name": "D1@Extrude1", "value": 10.0}
+                    ]
+                }
+            ],
+            modify_dimension=True
+        )
         
         result = await tools._modify_dimension(
             {
@@ -165,57 +277,138 @@ class TestSolidWorksTools:
         assert result["new_value"] == 15.0
         assert "original_value" in result
 
-    @pytest.mark.asyncio
-    async def test_export_model(self, tools, mock_adapter):
+    @pytest.mark.asyncio_cooperative
+    async def test_export_model(self, tools, mock_adapter, fake_fs):
         """Test model export"""
-        mock_adapter.export_file = AsyncMock(return_value=True)
+        _prime_adapter(mock_adapter, export_file=True)
+        fake_fs.existing.add(STEP_OUT)
         
-        with patch("pathlib.Path.mkdir"), \
-             patch("pathlib.Path.exists", return_value=True), \
-             patch("pathlib.Path.stat") as mock_stat:
-            
-            mock_stat.return_value.st_size = 1024000
-            
-            result = await tools._export_model(
-                {
-                    "output_path": "C:/export/test.step",
-                    "format": "STEP"
-                },
-                mock_adapter
-            )
+        result = await tools._export_model(
+            {
+                "output_path": STEP_OUT,
+                "format": "STEP"
+            },
+            mock_adapter
+        )
         
         assert result["success"] == True
         assert result["format"] == "STEP"
         assert "file_size_mb" in result
 
 
+class _FakeCollection:
+    """ChromaDB collection double that records each add() call"""
+
+    def __init__(self):
+        self.adds = []
+
+    def add(self, documents, metadatas, ids):
+        self.adds.append({"documents": documents, "metadatas": metadatas, "ids": ids})
+
+
+class TestKnowledgeBase:
+    """Test batched knowledge base writes"""
+
+    @pytest.fixture
+    def knowledge_base(self):
+        """Knowledge base with fake collections instead of ChromaDB"""
+        kb = SolidWorksKnowledgeBase.__new__(SolidWorksKnowledgeBase)
+        kb.operations_collection = _FakeCollection()
+        kb.patterns_collection = _FakeCollection()
+        kb.errors_collection = _FakeCollection()
+        kb.macros_collection = _FakeCollection()
+        return kb
+
+    @pytest.mark.asyncio_cooperative
+    async def test_store_batch(self, knowledge_base):
+        """Test one add per collection, with the last of any duplicate ids kept"""
+        batch = [
+            ("operation", {"operation": "open_model", "context": PART_ARGS,
+                           "result": {"attempt": 1}, "success": False}),
+            ("operation", {"operation": "get_features", "context": {},
+                           "result": {}, "success": True}),
+            ("operation", {"operation": "open_model", "context": PART_ARGS,
+                           "result": {"attempt": 2}, "success": True}),
+            ("error_solution", {"error_message": "boom", "error_context": {},
+                                "solution": "retry", "solution_steps": []}),
+        ]
+        
+        stored_ids = await knowledge_base.store_batch(batch)
+        
+        assert len(stored_ids) == 4
+        assert stored_ids[0] == stored_ids[2]
+        
+        operation_adds = knowledge_base.operations_collection.adds
+        assert len(operation_adds) == 1
+        assert operation_adds[0]["ids"] == stored_ids[:2]
+        assert operation_adds[0]["metadatas"][0]["result"] == '{"attempt": 2}'
+        assert operation_adds[0]["metadatas"][0]["success"] == True
+        
+        assert len(knowledge_base.errors_collection.adds) == 1
+        assert knowledge_base.patterns_collection.adds == []
+        assert knowledge_base.macros_collection.adds == []
+
+    @pytest.mark.asyncio_cooperative
+    async def test_store_batch_skips_unserializable_record(self, knowledge_base):
+        """Test that one record json cannot encode does not drop the rest of the batch"""
+        batch = [
+            ("operation", {"operation": "get_features", "context": {},
+                           "result": {}, "success": True}),
+            ("operation", {"operation": "execute_feature_action", "context": {},
+                           "result": {"raw": object()}, "success": True}),
+            ("operation", {"operation": "get_model_info", "context": {},
+                           "result": {}, "success": True}),
+        ]
+        
+        stored_ids = await knowledge_base.store_batch(batch)
+        
+        assert len(stored_ids) == 2
+        operation_adds = knowledge_base.operations_collection.adds
+        assert len(operation_adds) == 1
+        assert operation_adds[0]["ids"] == stored_ids
+
+    @pytest.mark.asyncio_cooperative
+    async def test_close_flushes_queued_writes(self, knowledge_base, mock_adapter):
+        """Test that close() stores every queued write before returning"""
+        tools = SolidWorksTools(knowledge_base=knowledge_base)
+        
+        await tools.execute("get_features", {}, mock_adapter)
+        await tools.execute("get_model_info", {}, mock_adapter)
+        await tools.close()
+        
+        stored_ids = [
+            record_id
+            for add in knowledge_base.operations_collection.adds
+            for record_id in add["ids"]
+        ]
+        assert len(stored_ids) == 2
+        assert tools._kb_drainer is None
+
+
 class TestContextBuilder:
     """Test context builder functionality"""
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def context_builder(self):
-        """Create context builder instance"""
+        """Create one context builder instance for the module"""
         return SolidWorksContextBuilder()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio_cooperative
     async def test_build_model_context(self, context_builder, mock_adapter):
         """Test building model context"""
         context = await context_builder._build_model_context(mock_adapter)
         
-        assert "Model: TestPart" in context
-        assert "Type: Part" in context
-        assert "Features Summary:" in context
+        assert MODEL_CONTEXT_PAT.search(context), context
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio_cooperative
     async def test_build_analysis_context(self, context_builder):
         """Test building analysis-specific context"""
         context = await context_builder._build_analysis_context(
-            {"file_path": "C:/test.sldprt"},
+            PART_ARGS,
             None
         )
         
-        assert "part file" in context
-        assert "Analysis should cover:" in context
+        assert ANALYSIS_CONTEXT_PAT.search(context), context
 
     def test_summarize_features(self, context_builder):
         """Test feature summarization"""
@@ -228,40 +421,30 @@ class TestContextBuilder:
         
         summary = context_builder._summarize_features(features)
         
-        assert "Total features: 4" in summary
-        assert "Extrusion: 2" in summary
-        assert "Suppressed features: 1" in summary
+        assert FEATURE_SUMMARY_PAT.search(summary), summary
 
 
 class TestIntegration:
     """Integration tests"""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio_cooperative
     async def test_full_workflow(self, mcp_server, mock_adapter):
         """Test a complete workflow"""
         mcp_server.current_adapter = mock_adapter
-        
-        # Open model
-        mock_adapter.open_document = AsyncMock(return_value={
-            "success": True,
-            "title": "TestPart"
-        })
-        
-        # Get features
-        mock_adapter.get_features = AsyncMock(return_value=[
-            {"name": "Base", "type": "Extrusion"},
-            {"name": "Hole1", "type": "Cut"}
-        ])
-        
-        # Modify dimension
-        mock_adapter.modify_dimension = AsyncMock(return_value=True)
-        
-        # Export
-        mock_adapter.export_file = AsyncMock(return_value=True)
+        _prime_adapter(
+            mock_adapter,
+            open_document={"success": True, "title": "TestPart"},
+            get_features=[
+                {"name": "Base", "type": "Extrusion"},
+                {"name": "Hole1", "type": "Cut"}
+            ],
+            modify_dimension=True,
+            export_file=True
+        )
         
         # Execute workflow
         tools = [
-            ("open_model", {"file_path": "C:/test.sldprt"}),
+            ("open_model", PART_ARGS),
             ("get_features", {}),
             ("modify_dimension", {
                 "feature_name": "Base",
@@ -274,10 +457,11 @@ class TestIntegration:
             })
         ]
         
+        # Each step builds on the previous one, so they run in order
         results = []
         for tool_name, args in tools:
             result = await mcp_server.server.call_tool(tool_name, args)
-            results.append(json.loads(result[0].text))
+            results.append(result[0].raw)
         
         # Verify workflow completed successfully
         assert all(r.get("success", False) for r in results)